@@ -1,4 +1,7 @@
-from flask import request
+import hashlib
+import json
+
+from flask import Response, request
 from flask_restful import Resource
 from datetime import date
 
@@ -60,3 +63,28 @@ class APIResource(Resource):
             return True, auth_header
         else:
             return False, None
+
+    @staticmethod
+    def not_modified_response(etag: str) -> Response | None:
+        # Answer with a 304 if the client already has the response identified by this ETag. The comparison is weak, as
+        # compressed responses are sent with a weak ETag.
+        if not request.if_none_match.contains_weak(etag):
+            return None
+
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+
+        return response
+
+    def conditional_response(self, body: dict, status: int = 200, etag: str | None = None):
+        # Without a version token, identify the response by its contents.
+        if etag is None:
+            etag = hashlib.sha256(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+        not_modified = self.not_modified_response(etag)
+
+        if not_modified:
+            return not_modified
+
+        return body, status, {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
@@ -0,0 +1,107 @@
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+from os import path
+
+from loguru import logger
+
+from utils import Utils
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class ArtifactCompressor:
+    # Encodings in order of preference, with the suffix their variant files use.
+    encodings: dict = {'zstd': '.zst', 'gzip': '.gz'}
+
+    def __init__(self, minimum_savings: float):
+        self.minimum_savings: float = minimum_savings
+        self.queue: queue.Queue = queue.Queue()
+        self.thread: threading.Thread | None = None
+
+    def initialize(self, filepaths: list):
+        if zstandard is None:
+            logger.warning('The zstandard module is not installed; only gzip variants will be produced.')
+
+        # Compress everything that has not been looked at yet.
+        for filepath in filepaths:
+            if path.exists(filepath) and not path.exists(self.get_record_filepath(filepath)):
+                self.queue_file(filepath)
+
+        self.thread = threading.Thread(target=self.__run, name='artifact-compressor', daemon=True)
+        self.thread.start()
+
+    def queue_file(self, filepath: str):
+        self.queue.put(filepath)
+
+    def compress_file(self, filepath: str) -> list:
+        original_size: int = path.getsize(filepath)
+        kept: list = []
+
+        for encoding, suffix in self.encodings.items():
+            if encoding == 'zstd' and zstandard is None:
+                continue
+
+            # Compress into a temporary file so a half-written variant is never served.
+            variant_filepath: str = filepath + suffix
+            temporary_filepath: str = variant_filepath + '.tmp'
+
+            with open(filepath, 'rb') as source, open(temporary_filepath, 'wb') as destination:
+                if encoding == 'zstd':
+                    zstandard.ZstdCompressor(level=19, threads=-1).copy_stream(source, destination)
+                else:
+                    with gzip.GzipFile(fileobj=destination, mode='wb', compresslevel=9, mtime=0) as compressed:
+                        shutil.copyfileobj(source, compressed, 1048576)
+
+            # Only keep the variant if it is meaningfully smaller than the original.
+            if path.getsize(temporary_filepath) <= original_size * (1 - self.minimum_savings):
+                os.replace(temporary_filepath, variant_filepath)
+                kept.append(encoding)
+            else:
+                os.remove(temporary_filepath)
+
+        # Record which variants exist so the file is not compressed again and downloads don't have to stat each one.
+        with open(self.get_record_filepath(filepath), 'w') as record_file:
+            json.dump(kept, record_file)
+
+        logger.info(f'Compressed {filepath} - kept variants: {kept}')
+
+        return kept
+
+    def select_variant(self, filepath: str, accept_encoding: str | None) -> tuple[str, str | None]:
+        record_filepath: str = self.get_record_filepath(filepath)
+
+        if not accept_encoding or not path.exists(record_filepath):
+            return filepath, None
+
+        with open(record_filepath) as record_file:
+            available: list = json.load(record_file)
+
+        accepted: dict = Utils.parse_accept_encoding(accept_encoding)
+
+        # Pick the most preferred encoding that the client accepts and that is worth serving.
+        for encoding, suffix in self.encodings.items():
+            if encoding in available and accepted.get(encoding, accepted.get('*', 0)) > 0:
+                return filepath + suffix, encoding
+
+        return filepath, None
+
+    @staticmethod
+    def get_record_filepath(filepath: str) -> str:
+        return filepath + '.variants.json'
+
+    def __run(self):
+        while True:
+            filepath: str = self.queue.get()
+
+            try:
+                self.compress_file(filepath)
+            except Exception as exception:
+                logger.error(f'Failed to compress {filepath}: {exception}')
+
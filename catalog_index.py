@@ -0,0 +1,126 @@
+import threading
+
+from database import Database
+from structures.application import Application
+
+
+class CatalogIndex:
+    # Maps each facet name to the application attribute it is built from.
+    facets: dict = {'platform': 'supported_platforms', 'genre': 'genres', 'tag': 'tags'}
+
+    def __init__(self, database: Database):
+        self.database: Database = database
+        # Every facet value maps to a bitset (a Python int) with bit n set if application n has that value.
+        self.bitsets: dict[str, dict[str, int]] = {facet: {} for facet in self.facets}
+        self.application_values: dict[int, dict[str, set]] = {}
+        self.all_applications: int = 0
+        self.lock = threading.Lock()
+
+    def initialize(self):
+        for application in self.database.get_all_applications():
+            self.index_application(application)
+
+        # Keep the index up to date as applications change.
+        self.database.add_listener('application_changed', self.refresh_application)
+
+    def refresh_application(self, application_id: int):
+        application: Application | None = self.database.get_application(application_id)
+
+        if application is None:
+            self.remove_application(application_id)
+        else:
+            self.index_application(application)
+
+    def index_application(self, application: Application):
+        values: dict[str, set] = {
+            facet: {self.normalize(value) for value in getattr(application, attribute) if self.normalize(value)}
+            for facet, attribute in self.facets.items()
+        }
+
+        with self.lock:
+            self.__remove_bits(application.id)
+
+            bit: int = 1 << application.id
+
+            for facet, facet_values in values.items():
+                for value in facet_values:
+                    self.bitsets[facet][value] = self.bitsets[facet].get(value, 0) | bit
+
+            self.application_values[application.id] = values
+            self.all_applications |= bit
+
+    def remove_application(self, application_id: int):
+        with self.lock:
+            self.__remove_bits(application_id)
+
+    def query(self, filters: dict[str, list]) -> int:
+        with self.lock:
+            result: int = self.all_applications
+
+            # Values within a facet are alternatives (OR); different facets must all match (AND).
+            for facet, values in filters.items():
+                matches: int = 0
+
+                for value in values:
+                    matches |= self.bitsets[facet].get(self.normalize(value), 0)
+
+                result &= matches
+
+            return result
+
+    def count_facets(self, result: int) -> dict[str, dict[str, int]]:
+        counts: dict[str, dict[str, int]] = {}
+
+        with self.lock:
+            for facet, bitsets in self.bitsets.items():
+                counts[facet] = {}
+
+                for value, bitset in bitsets.items():
+                    count: int = (bitset & result).bit_count()
+
+                    if count:
+                        counts[facet][value] = count
+
+        return counts
+
+    @staticmethod
+    def to_bitset(ids) -> int:
+        bitset: int = 0
+
+        for id_ in ids:
+            bitset |= 1 << id_
+
+        return bitset
+
+    @staticmethod
+    def to_ids(bitset: int) -> list[int]:
+        ids: list[int] = []
+
+        # Walk the set bits from lowest to highest.
+        while bitset:
+            lowest: int = bitset & -bitset
+            ids.append(lowest.bit_length() - 1)
+            bitset ^= lowest
+
+        return ids
+
+    @staticmethod
+    def normalize(value: str) -> str:
+        return value.strip().lower()
+
+    def __remove_bits(self, application_id: int):
+        values: dict[str, set] | None = self.application_values.pop(application_id, None)
+
+        if values is None:
+            return
+
+        mask: int = ~(1 << application_id)
+
+        for facet, facet_values in values.items():
+            for value in facet_values:
+                self.bitsets[facet][value] &= mask
+
+                if not self.bitsets[facet][value]:
+                    del self.bitsets[facet][value]
+
+        self.all_applications &= mask
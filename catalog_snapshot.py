@@ -0,0 +1,74 @@
+import json
+import threading
+from datetime import date
+
+from loguru import logger
+
+from database import Database
+from utils import Utils
+
+
+class CatalogSnapshot:
+    # Writes that change what the catalog looks like.
+    events: list = ['application_changed', 'iap_created', 'sale_created', 'sale_deleted']
+
+    def __init__(self, database: Database):
+        self.database: Database = database
+        # The boot id keeps ETags from a previous run from matching after the version counter restarts.
+        self.boot_id: str = Utils.generate_uuid4()[:8]
+        self.version: int = 1
+        self.built_version: int = 0
+        self.built_date: date | None = None
+        self.data: bytes = b''
+        self.etag: str = ''
+        self.lock = threading.Lock()
+
+    def initialize(self):
+        for event in self.events:
+            self.database.add_listener(event, self.bump)
+
+    def bump(self, *args):
+        with self.lock:
+            self.version += 1
+
+    def token(self, *parts) -> str:
+        # A version token for responses that only change when the catalog does.
+        return '-'.join(['catalog', self.boot_id, str(self.version)] + [str(part) for part in parts])
+
+    def get(self) -> tuple[bytes, str]:
+        with self.lock:
+            # Prices depend on which sales are active, so the snapshot also goes stale at midnight.
+            if self.built_version != self.version or self.built_date != date.today():
+                self.__build()
+
+            return self.data, self.etag
+
+    def __build(self):
+        version: int = self.version
+        today: date = date.today()
+
+        # Gather everything with one query per table instead of one per application.
+        iaps: dict = {}
+
+        for iap in self.database.get_all_iaps():
+            iaps.setdefault(iap.application_id, []).append(Utils.serialize(iap))
+
+        sales: dict = {sale.application_id: sale for sale in self.database.get_active_sales(today)}
+
+        applications: list = []
+
+        for application in self.database.get_all_applications():
+            sale = sales.get(application.id)
+            entry: dict = Utils.serialize(application)
+            entry['price'] = sale.price if sale else application.base_price
+            entry['active_sale'] = Utils.serialize(sale) if sale else None
+            entry['iaps'] = iaps.get(application.id, [])
+
+            applications.append(entry)
+
+        self.data = json.dumps({'version': version, 'applications': applications}).encode('utf-8')
+        self.etag = f'catalog-{self.boot_id}-{version}-{today}'
+        self.built_version = version
+        self.built_date = today
+
+        logger.info(f'Built catalog snapshot version {version} - applications: {len(applications)}')
@@ -0,0 +1,56 @@
+import os
+import sys
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from database import Database
+from email_manager import EmailManager
+from file_manager import FileManager
+from storage_collector import StorageCollector
+from main import BASE_DIRECTORY, PHOTOS_DIRECTORY, APPLICATIONS_DIRECTORY, UPLOADS_DIRECTORY, CHUNKS_DIRECTORY, \
+    QUARANTINE_DIRECTORY
+
+
+# Constants.
+BATCH_SIZE: int = 500
+PAUSE_SECONDS: float = 0.5
+GRACE_SECONDS: int = 24 * 60 * 60
+RETENTION_SECONDS: int = 7 * 24 * 60 * 60
+
+
+# Removes photo and version files that no database row refers to, along with replaced profile photos nobody has set
+# again, and reports rows whose files are missing and versions that have been superseded.
+# Orphans are quarantined first and only deleted once they have sat in quarantine for the retention period.
+# Pass --dry-run to only report what would be done, and --collect-superseded to also remove superseded versions.
+def main():
+    logger.remove()
+    logger.add(sys.stdout, level='INFO')
+
+    load_dotenv()
+
+    email_manager = EmailManager(os.getenv('EMAIL_ADDRESS'), os.getenv('APP_PASSWORD'), os.getenv('DISPLAY_NAME'))
+
+    database = Database(email_manager)
+    database.initialize()
+
+    file_manager = FileManager(database, BASE_DIRECTORY, PHOTOS_DIRECTORY, APPLICATIONS_DIRECTORY, UPLOADS_DIRECTORY,
+                               CHUNKS_DIRECTORY, QUARANTINE_DIRECTORY)
+    file_manager.initialize()
+
+    storage_collector = StorageCollector(database, file_manager, BATCH_SIZE, PAUSE_SECONDS, GRACE_SECONDS,
+                                         RETENTION_SECONDS, '--collect-superseded' in sys.argv)
+    report: dict = storage_collector.collect('--dry-run' in sys.argv)
+
+    if report['missing_photos']:
+        logger.warning(f'Photos whose files are missing: {report["missing_photos"]}')
+
+    if report['missing_versions']:
+        logger.warning(f'Versions whose files are missing: {report["missing_versions"]}')
+
+    if report['superseded_versions']:
+        logger.info(f'Superseded versions: {report["superseded_versions"]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+import hashlib
 import json
 import sqlite3
 
@@ -13,7 +14,9 @@ from structures.application_session import ApplicationSession
 from structures.application_version import ApplicationVersion
 from structures.cloud_data import CloudData
 from structures.deposit import Deposit
+from structures.download_statistic import DownloadStatistic
 from structures.friend import Friend
+from structures.friend_change import FriendChange
 from structures.friend_request import FriendRequest
 from structures.iap import IAP
 from structures.invite import Invite
@@ -33,6 +36,7 @@ class Database:
         self.connection = None
         self.cursor = None
         self.email_manager: EmailManager = email_manager
+        self.listeners: dict[str, list] = {}
 
     def initialize(self):
         if not self.initialized:
@@ -238,10 +242,42 @@ class Database:
                 `user_id` INTEGER NOT NULL,
                 `application_id` INTEGER NOT NULL,
                 `data` TEXT NOT NULL,
-                `date` DATE NOT NULL
+                `date` DATE NOT NULL,
+                `blob` BLOB,
+                `encoding` TEXT,
+                `size` INTEGER NOT NULL DEFAULT 0,
+                `hash` TEXT NOT NULL DEFAULT '',
+                `revision` INTEGER NOT NULL DEFAULT 1
             )
             ''')
 
+            # Add the compressed storage columns to cloud data tables created before they existed.
+            self.cursor.execute('PRAGMA table_info(`cloud_data`)')
+            cloud_data_columns: list = [row['name'] for row in self.cursor.fetchall()]
+
+            for column, definition in [('blob', 'BLOB'), ('encoding', 'TEXT'), ('size', 'INTEGER NOT NULL DEFAULT 0'),
+                                       ('hash', "TEXT NOT NULL DEFAULT ''"),
+                                       ('revision', 'INTEGER NOT NULL DEFAULT 1')]:
+                if column not in cloud_data_columns:
+                    self.cursor.execute(f'ALTER TABLE `cloud_data` ADD COLUMN `{column}` {definition}')
+
+            # Each user has at most one save per application, which lets uploads update it in place.
+            self.cursor.execute("SELECT * FROM `sqlite_master` WHERE `name` = 'cloud_data_user_application'")
+
+            if self.cursor.fetchone() is None:
+                self.cursor.execute('''
+                DELETE FROM `cloud_data` WHERE `id` NOT IN (
+                    SELECT MAX(`id`) FROM `cloud_data` GROUP BY `user_id`, `application_id`
+                )
+                ''')
+
+                self.cursor.execute('''
+                CREATE UNIQUE INDEX `cloud_data_user_application` ON `cloud_data` (`user_id`, `application_id`)
+                ''')
+
+                # Commit the changes.
+                self.connection.commit()
+
             self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS `iap_records` (
                 `id` INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -253,8 +289,126 @@ class Database:
             )
             ''')
 
+            self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS `download_statistics` (
+                `application_id` INTEGER NOT NULL,
+                `version_id` INTEGER NOT NULL,
+                `platform` TEXT NOT NULL,
+                `date` DATE NOT NULL,
+                `downloads` INTEGER NOT NULL,
+                PRIMARY KEY (`version_id`, `platform`, `date`)
+            )
+            ''')
+
+            self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS `download_statistics_application` ON `download_statistics` (`application_id`, `date`)
+            ''')
+
+            # Record every friendship change, so clients can catch up on what changed since they last checked.
+            self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS `friend_changes` (
+                `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+                `user_id` INTEGER NOT NULL,
+                `other_user_id` INTEGER NOT NULL,
+                `change` TEXT NOT NULL,
+                `date` DATE NOT NULL
+            )
+            ''')
+
+            # Record the profile photos users have replaced, so the storage collector knows which photos it may remove.
+            self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS `replaced_photos` (
+                `photo_id` INTEGER PRIMARY KEY,
+                `date` DATE NOT NULL
+            )
+            ''')
+
+            # Index the friends table by the user whose friends are being listed.
+            self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS `friends_other_user` ON `friends` (`other_user_id`, `user_id`)
+            ''')
+
+            # Index everything the inbox reads by recipient, then by id for the cursor.
+            self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS `friend_requests_user` ON `friend_requests` (`user_id`, `id`)
+            ''')
+
+            self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS `invites_user` ON `invites` (`user_id`, `id`)
+            ''')
+
+            self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS `iap_records_user` ON `iap_records` (`user_id`, `acknowledged`, `id`)
+            ''')
+
+            self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS `friend_changes_user` ON `friend_changes` (`user_id`, `id`)
+            ''')
+
+            # Create the full-text search index over the application catalog.
+            self.cursor.execute('SELECT * FROM `sqlite_master` WHERE `name` = ?', ('applications_search',))
+            search_index_exists: bool = self.cursor.fetchone() is not None
+
+            self.cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS `applications_search` USING fts5(
+                `name`,
+                `description`,
+                `tags`,
+                `genres`,
+                content='applications',
+                content_rowid='id',
+                tokenize="unicode61 separators ','"
+            )
+            ''')
+
+            # Keep the search index in sync with the applications table.
+            self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS `applications_search_insert` AFTER INSERT ON `applications` BEGIN
+                INSERT INTO `applications_search` (`rowid`, `name`, `description`, `tags`, `genres`)
+                VALUES (new.`id`, new.`name`, new.`description`, new.`tags`, new.`genres`);
+            END
+            ''')
+
+            self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS `applications_search_delete` AFTER DELETE ON `applications` BEGIN
+                INSERT INTO `applications_search` (`applications_search`, `rowid`, `name`, `description`, `tags`, `genres`)
+                VALUES ('delete', old.`id`, old.`name`, old.`description`, old.`tags`, old.`genres`);
+            END
+            ''')
+
+            self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS `applications_search_update` AFTER UPDATE ON `applications` BEGIN
+                INSERT INTO `applications_search` (`applications_search`, `rowid`, `name`, `description`, `tags`, `genres`)
+                VALUES ('delete', old.`id`, old.`name`, old.`description`, old.`tags`, old.`genres`);
+                INSERT INTO `applications_search` (`rowid`, `name`, `description`, `tags`, `genres`)
+                VALUES (new.`id`, new.`name`, new.`description`, new.`tags`, new.`genres`);
+            END
+            ''')
+
+            # Index the applications that existed before the search index did.
+            if not search_index_exists:
+                logger.info('Building the application search index.')
+                self.cursor.execute('INSERT INTO `applications_search` (`applications_search`) VALUES (?)', ('rebuild',))
+
+                # Commit the changes.
+                self.connection.commit()
+
+            # Compress the saves that were stored as plain JSON.
+            self.compress_legacy_cloud_data()
+
         self.initialized = True
 
+    def add_listener(self, event: str, callback):
+        # Register a callback to be run whenever the specified event happens.
+        self.listeners.setdefault(event, []).append(callback)
+
+    def notify(self, event: str, *args):
+        for callback in self.listeners.get(event, []):
+            try:
+                callback(*args)
+            except Exception as exception:
+                logger.error(f'Listener for {event} failed: {exception}')
+
     def username_taken(self, username: str) -> bool:
         # Check if a user exists with that username.
         self.cursor.execute('SELECT * FROM `users` WHERE `username` = ? COLLATE NOCASE', (username,))
@@ -406,6 +560,21 @@ class Database:
 
         return Utils.row_to_user(row)
 
+    def get_users_by_ids(self, ids: list[int]) -> list[User]:
+        if not ids:
+            return []
+
+        # Fetch all the users in a single query.
+        self.cursor.execute(f'SELECT * FROM `users` WHERE `id` IN ({", ".join("?" * len(ids))})', ids)
+
+        users: dict[int, User] = {}
+
+        for row in self.cursor.fetchall():
+            users[row['id']] = Utils.row_to_user(row)
+
+        # Keep the order the ids were requested in.
+        return [users[id_] for id_ in ids if id_ in users]
+
     def update_user_property(self, user_id: int, property_: str, value):
         # Attempt to update the user.
         self.cursor.execute(f'UPDATE `users` SET `{property_}` = ? WHERE `id` = ?', (value, user_id))
@@ -413,6 +582,19 @@ class Database:
         # Commit the changes.
         self.connection.commit()
 
+    def update_user_activities(self, rows: list[tuple[str, int]]):
+        # This runs on the presence manager's thread, so it uses its own connection rather than the shared cursor.
+        connection = sqlite3.connect(self.path, timeout=30)
+
+        try:
+            # Write every (activity, user id) pair in a single transaction.
+            connection.executemany('UPDATE `users` SET `activity` = ? WHERE `id` = ?', rows)
+
+            # Commit the changes.
+            connection.commit()
+        finally:
+            connection.close()
+
     def create_application(self, name: str, package_name: str, type_: str, description: str, release_date: date,
                            early_access: bool, latest_version: str, supported_platforms: list, genres: list, tags: list,
                            base_price: float, owners: list) -> tuple[bool, dict]:
@@ -442,7 +624,11 @@ class Database:
                     f'early access: {early_access}, supported platforms: {supported_platforms_string}, '
                     f'genres: {genres_string}, tags: {tags_string}, owners: {owners_string}')
 
-        return True, {'details': 'Application created successfully.', 'application_id': self.cursor.lastrowid}
+        application_id: int = self.cursor.lastrowid
+
+        self.notify('application_changed', application_id)
+
+        return True, {'details': 'Application created successfully.', 'application_id': application_id}
 
     def get_application(self, identifier, identifier_type: str = 'id') -> Application | None:
         # Ensure that the identifier type is valid.
@@ -468,6 +654,52 @@ class Database:
 
         return applications
 
+    def get_applications_by_ids(self, ids: list[int]) -> list[Application]:
+        if not ids:
+            return []
+
+        # Fetch all the applications in a single query.
+        self.cursor.execute(f'SELECT * FROM `applications` WHERE `id` IN ({", ".join("?" * len(ids))})', ids)
+
+        applications: dict[int, Application] = {}
+
+        for row in self.cursor.fetchall():
+            applications[row['id']] = Utils.row_to_application(row)
+
+        # Keep the order the ids were requested in.
+        return [applications[id_] for id_ in ids if id_ in applications]
+
+    def search_applications(self, query: str, limit: int, offset: int) -> tuple[list[Application], int]:
+        # Quote every word so user input can't be interpreted as FTS syntax, and match on prefixes for
+        # search-as-you-type.
+        terms: list = ['"' + term.replace('"', '') + '"*' for term in query.split() if term.replace('"', '')]
+
+        if not terms:
+            return [], 0
+
+        match: str = ' '.join(terms)
+
+        # Count the total matches for pagination.
+        self.cursor.execute('SELECT COUNT(*) AS `total` FROM `applications_search` WHERE `applications_search` MATCH ?',
+                            (match,))
+        total: int = self.cursor.fetchone()['total']
+
+        # Fetch the requested page, ranking name matches above tag and genre matches, and those above the description.
+        self.cursor.execute('''
+        SELECT `applications`.* FROM `applications_search`
+        JOIN `applications` ON `applications`.`id` = `applications_search`.`rowid`
+        WHERE `applications_search` MATCH ?
+        ORDER BY bm25(`applications_search`, 10.0, 1.0, 3.0, 3.0)
+        LIMIT ? OFFSET ?
+        ''', (match, limit, offset))
+
+        applications: list[Application] = []
+
+        for row in self.cursor.fetchall():
+            applications.append(Utils.row_to_application(row))
+
+        return applications, total
+
     def update_application_property(self, application_id: int, property_: str, value):
         # Attempt to update the specified application.
         self.cursor.execute(f'UPDATE `applications` SET `{property_}` = ? WHERE `id` = ?', (value, application_id))
@@ -477,6 +709,8 @@ class Database:
 
         logger.info(f'Updated application ({application_id}) property: {property_} - value: {value}')
 
+        self.notify('application_changed', application_id)
+
     def create_application_version(self, application_id: int, name: str, platform: str, release_date: date,
                                    filename: str, executable: str) -> tuple[bool, dict]:
         # Make sure the version does not already exist.
@@ -543,6 +777,73 @@ class Database:
 
         return Utils.row_to_application_version(row)
 
+    def get_all_application_versions(self) -> list[ApplicationVersion]:
+        versions: list[ApplicationVersion] = []
+
+        # Fetch every version of every application.
+        self.cursor.execute('SELECT * FROM `application_versions`')
+
+        for row in self.cursor.fetchall():
+            versions.append(Utils.row_to_application_version(row))
+
+        return versions
+
+    def get_application_versions_after(self, after_id: int, limit: int) -> list[ApplicationVersion]:
+        versions: list[ApplicationVersion] = []
+
+        # Fetch a page of versions by id, so walking the whole table never holds a long read.
+        self.cursor.execute('SELECT * FROM `application_versions` WHERE `id` > ? ORDER BY `id` LIMIT ?',
+                            (after_id, limit))
+
+        for row in self.cursor.fetchall():
+            versions.append(Utils.row_to_application_version(row))
+
+        return versions
+
+    def delete_application_versions(self, ids: list[int]):
+        if not ids:
+            return
+
+        # Delete the versions in a single transaction.
+        self.cursor.executemany('DELETE FROM `application_versions` WHERE `id` = ?', [(id_,) for id_ in ids])
+
+        # Commit the changes.
+        self.connection.commit()
+
+        logger.info(f'Deleted application versions: {ids}')
+
+    def add_download_statistics(self, rows: list[tuple]):
+        # This runs on the statistics flusher's thread, so it uses its own connection rather than the shared cursor.
+        connection = sqlite3.connect(self.path, timeout=30)
+
+        try:
+            # Add the counts to the existing totals in a single transaction.
+            connection.executemany('''
+            INSERT INTO `download_statistics` (`application_id`, `version_id`, `platform`, `date`, `downloads`)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (`version_id`, `platform`, `date`) DO UPDATE SET `downloads` = `downloads` + excluded.`downloads`
+            ''', rows)
+
+            # Commit the changes.
+            connection.commit()
+        finally:
+            connection.close()
+
+    def get_download_statistics(self, application_id: int, start_date: date,
+                                end_date: date) -> list[DownloadStatistic]:
+        statistics: list[DownloadStatistic] = []
+
+        # Fetch the daily download counts for an application within the date range.
+        self.cursor.execute('''
+        SELECT * FROM `download_statistics` WHERE `application_id` = ? AND `date` BETWEEN ? AND ?
+        ORDER BY `date`, `version_id`, `platform`
+        ''', (application_id, start_date, end_date))
+
+        for row in self.cursor.fetchall():
+            statistics.append(Utils.row_to_download_statistic(row))
+
+        return statistics
+
     def create_sale(self, application_id: int, title: str, description: str, price: float, start_date: date,
                     end_date: date) -> tuple[bool, dict]:
         # Ensure that a sale will not be active between the specified dates.
@@ -572,6 +873,8 @@ class Database:
         logger.info(f'Created sale for application: {application_id} - title: {title}, description: {description}, '
                     f'price: {price_string}, start date: {start_date}, end date: {end_date}')
 
+        self.notify('sale_created', application_id)
+
         return True, {'details': 'Sale created successfully.'}
 
     def delete_sale(self, id_: int) -> tuple[bool, dict]:
@@ -587,6 +890,8 @@ class Database:
 
         logger.info(f'Deleted sale: {id_}')
 
+        self.notify('sale_deleted', id_)
+
         return True, {'details': 'Sale deleted successfully.'}
 
     def get_active_sale(self, application_id: int, active_date: date) -> Sale | None:
@@ -604,6 +909,24 @@ class Database:
 
         return None
 
+    def get_active_sales(self, active_date: date) -> list[Sale]:
+        sales: list[Sale] = []
+
+        # Fetch every sale that is active on the specified date.
+        self.cursor.execute('SELECT * FROM `sales` WHERE `start_date` <= ? AND `end_date` >= ?', (active_date, active_date))
+
+        for row in self.cursor.fetchall():
+            sales.append(Utils.row_to_sale(row))
+
+        return sales
+
+    def get_on_sale_application_ids(self, active_date: date) -> list[int]:
+        # Dates are stored as ISO strings, so they can be compared directly.
+        self.cursor.execute('SELECT DISTINCT `application_id` FROM `sales` WHERE `start_date` <= ? AND `end_date` >= ?',
+                            (active_date, active_date))
+
+        return [row['application_id'] for row in self.cursor.fetchall()]
+
     def get_sale(self, id_: int) -> Sale | None:
         # Attempt to get the sale from the provided id.
         self.cursor.execute('SELECT * FROM `sales` WHERE `id` = ?', (id_,))
@@ -820,13 +1143,16 @@ class Database:
         INSERT INTO `friend_requests` (`user_id`, `from_user_id`, `date`)
         VALUES (?, ?, ?)
         ''', (user_id, from_user_id, date.today()))
+        id_: int = self.cursor.lastrowid
 
         # Commit the changes.
         self.connection.commit()
 
         logger.info(f'User {from_user_id} sent a friend request to user: {user_id}')
 
-        return True, {'details': 'Friend request created successfully.', 'id': self.cursor.lastrowid}
+        self.notify('friend_request_created', id_, user_id, from_user_id)
+
+        return True, {'details': 'Friend request created successfully.', 'id': id_}
 
     def get_friend_request_by_id(self, id_: int) -> FriendRequest | None:
         self.cursor.execute('SELECT * FROM `friend_requests` WHERE `id` = ?', (id_,))
@@ -887,6 +1213,9 @@ class Database:
         VALUES (?, ?, ?)
         ''', (user_id, from_user_id, today))
 
+        # Record the change for both users.
+        self.__record_friend_changes([(user_id, from_user_id)], 'added', today)
+
         # Commit the changes.
         self.connection.commit()
 
@@ -895,8 +1224,45 @@ class Database:
 
         logger.info(f'User {user_id} accepted a friend request from user: {from_user_id} - they are now friends.')
 
+        self.notify('friend_added', user_id, from_user_id)
+
         return True, {'details': 'Friend request accepted successfully.'}
 
+    def get_friend_requests_by_ids(self, ids: list[int]) -> list[FriendRequest]:
+        if not ids:
+            return []
+
+        # Fetch all the friend requests in a single query.
+        self.cursor.execute(f'SELECT * FROM `friend_requests` WHERE `id` IN ({", ".join("?" * len(ids))})', ids)
+
+        return [Utils.row_to_friend_request(row) for row in self.cursor.fetchall()]
+
+    def process_friend_requests(self, accepted: list[FriendRequest], deleted: list[FriendRequest]):
+        today: date = date.today()
+
+        # Add both directions of every accepted friendship.
+        self.cursor.executemany('''
+        INSERT INTO `friends` (`user_id`, `other_user_id`, `date`)
+        VALUES (?, ?, ?)
+        ''', [row for request in accepted
+              for row in [(request.from_user_id, request.user_id, today),
+                          (request.user_id, request.from_user_id, today)]])
+
+        self.__record_friend_changes([(request.user_id, request.from_user_id) for request in accepted], 'added', today)
+
+        # Accepted requests are removed along with the declined and deleted ones.
+        self.cursor.executemany('DELETE FROM `friend_requests` WHERE `id` = ?',
+                                [(request.id,) for request in accepted + deleted])
+
+        # Commit all the changes at once.
+        self.connection.commit()
+
+        logger.info(f'Processed friend requests - accepted: {[request.id for request in accepted]}, '
+                    f'deleted: {[request.id for request in deleted]}')
+
+        for request in accepted:
+            self.notify('friend_added', request.user_id, request.from_user_id)
+
     def get_incoming_friend_requests(self, user_id: int) -> list[FriendRequest]:
         friend_requests: list[FriendRequest] = []
 
@@ -909,6 +1275,19 @@ class Database:
 
         return friend_requests
 
+    def get_incoming_friend_requests_since(self, user_id: int, after_id: int, limit: int) -> list[FriendRequest]:
+        friend_requests: list[FriendRequest] = []
+
+        # Get the requests after the given id, oldest first.
+        self.cursor.execute('''
+        SELECT * FROM `friend_requests` WHERE `user_id` = ? AND `id` > ? ORDER BY `id` LIMIT ?
+        ''', (user_id, after_id, limit))
+
+        for row in self.cursor.fetchall():
+            friend_requests.append(Utils.row_to_friend_request(row))
+
+        return friend_requests
+
     def get_outgoing_friend_requests(self, user_id: int) -> list[FriendRequest]:
         friend_requests: list[FriendRequest] = []
 
@@ -935,6 +1314,39 @@ class Database:
 
         return friends
 
+    def get_friends_expanded(self, user_id: int,
+                             include_photos: bool = False) -> list[tuple[Friend, User, Photo | None]]:
+        expanded_friends: list[tuple[Friend, User, Photo | None]] = []
+
+        # Get all friends of the specified user along with their profiles (and photos) in a single query.
+        # The friend and photo columns are renamed so they don't collide with the user's.
+        photo_columns: str = '''
+        , `photos`.`id` AS `photo_id`, `photos`.`filename` AS `photo_filename`,
+        `photos`.`subfolder` AS `photo_subfolder`, `photos`.`created_at` AS `photo_created_at`
+        ''' if include_photos else ''
+        photo_join: str = 'LEFT JOIN `photos` ON `photos`.`id` = `users`.`profile_photo_id`' if include_photos else ''
+
+        self.cursor.execute(f'''
+        SELECT `users`.*, `friends`.`id` AS `friend_id`, `friends`.`user_id` AS `friend_user_id`,
+        `friends`.`other_user_id` AS `friend_other_user_id`, `friends`.`date` AS `friend_date` {photo_columns}
+        FROM `friends`
+        JOIN `users` ON `users`.`id` = `friends`.`user_id`
+        {photo_join}
+        WHERE `friends`.`other_user_id` = ?
+        ''', (user_id,))
+
+        for row in self.cursor.fetchall():
+            friend: Friend = Friend(row['friend_id'], row['friend_user_id'], row['friend_other_user_id'],
+                                    row['friend_date'])
+            photo: Photo | None = Photo(row['photo_id'], row['photo_filename'], row['photo_subfolder'],
+                                        row['photo_created_at']) \
+                if include_photos and row['photo_id'] is not None \
+                else None
+
+            expanded_friends.append((friend, Utils.row_to_user(row), photo))
+
+        return expanded_friends
+
     def get_friend_by_id(self, id_: int) -> Friend | None:
         # Attempt to get the friend entry from the provided id.
         self.cursor.execute('SELECT * FROM `friends` WHERE `id` = ?', (id_,))
@@ -955,6 +1367,44 @@ class Database:
 
         return Utils.row_to_friend(row)
 
+    def get_friend_changes_since(self, user_id: int, after_id: int, limit: int) -> list[FriendChange]:
+        changes: list[FriendChange] = []
+
+        # Get the user's friendship changes after the given id, oldest first.
+        self.cursor.execute('''
+        SELECT * FROM `friend_changes` WHERE `user_id` = ? AND `id` > ? ORDER BY `id` LIMIT ?
+        ''', (user_id, after_id, limit))
+
+        for row in self.cursor.fetchall():
+            changes.append(Utils.row_to_friend_change(row))
+
+        return changes
+
+    def __record_friend_changes(self, pairs: list[tuple[int, int]], change: str, date_: date):
+        # Both users see the change, each from their own side. The caller commits.
+        self.cursor.executemany('''
+        INSERT INTO `friend_changes` (`user_id`, `other_user_id`, `change`, `date`)
+        VALUES (?, ?, ?, ?)
+        ''', [row for user_id, other_user_id in pairs
+              for row in [(user_id, other_user_id, change, date_), (other_user_id, user_id, change, date_)]])
+
+    def get_friend_ids_among(self, user_id: int, candidate_ids: list[int]) -> set[int]:
+        if not candidate_ids:
+            return set()
+
+        # Find which of the candidates are friends with the user in a single query.
+        placeholders: str = ', '.join('?' * len(candidate_ids))
+        self.cursor.execute(f'SELECT `user_id` FROM `friends` WHERE `other_user_id` = ? AND `user_id` IN ({placeholders})',
+                            [user_id] + candidate_ids)
+
+        return {row['user_id'] for row in self.cursor.fetchall()}
+
+    def get_friend_pairs(self) -> list[tuple[int, int]]:
+        # Fetch every friendship as (user id, friend id), grouped by user.
+        self.cursor.execute('SELECT `other_user_id`, `user_id` FROM `friends` ORDER BY `other_user_id`, `user_id`')
+
+        return [(row['other_user_id'], row['user_id']) for row in self.cursor.fetchall()]
+
     def are_friends(self, user_id: int, from_user_id: int) -> bool:
         # Check if two users are friends.
         return self.get_friend_by_users(user_id, from_user_id) is not None
@@ -971,11 +1421,16 @@ class Database:
         # Entry 2:
         self.cursor.execute('DELETE FROM `friends` WHERE `user_id` = ? AND `other_user_id` = ?', (other_user_id, user_id))
 
+        # Record the change for both users.
+        self.__record_friend_changes([(user_id, other_user_id)], 'removed', date.today())
+
         # Commit the changes.
         self.connection.commit()
 
         logger.warning(f'User: {user_id} removed user: {other_user_id} as a friend. They are no long friends.')
 
+        self.notify('friend_removed', user_id, other_user_id)
+
         return True, {'details': 'Friend removed successfully.'}
 
     def create_session(self, user_id: int, hostname: str, mac_address: str, platform: str, start_date: date,
@@ -1048,12 +1503,45 @@ class Database:
         INSERT INTO `invites` (`user_id`, `from_user_id`, `application_id`, `details`, `date`)
         VALUES (?, ?, ?, ?, ?)
         ''', (user_id, from_user_id, application_id, json.dumps(details), date_))
+        id_: int = self.cursor.lastrowid
 
         # Commit the changes.
         self.connection.commit()
 
         logger.info(f'User: {user_id} invited user: {from_user_id} - application: {application_id}, details: {details}')
 
+        self.notify('invite_created', id_, user_id, from_user_id, application_id)
+
+    def create_invites(self, user_ids: list[int], from_user_id: int, application_id: int, details: dict,
+                       date_: date) -> list[Invite]:
+        if not user_ids:
+            return []
+
+        # Remember where the ids stand, so the new invites can be fetched back afterwards.
+        self.cursor.execute('SELECT COALESCE(MAX(`id`), 0) AS `last_id` FROM `invites`')
+        last_id: int = self.cursor.fetchone()['last_id']
+
+        # Create all the invites in a single transaction.
+        self.cursor.executemany('''
+        INSERT INTO `invites` (`user_id`, `from_user_id`, `application_id`, `details`, `date`)
+        VALUES (?, ?, ?, ?, ?)
+        ''', [(user_id, from_user_id, application_id, json.dumps(details), date_) for user_id in user_ids])
+
+        self.cursor.execute('''
+        SELECT * FROM `invites` WHERE `id` > ? AND `from_user_id` = ? AND `application_id` = ? ORDER BY `id`
+        ''', (last_id, from_user_id, application_id))
+        invites: list[Invite] = [Utils.row_to_invite(row) for row in self.cursor.fetchall()]
+
+        # Commit the changes.
+        self.connection.commit()
+
+        logger.info(f'User: {from_user_id} invited users: {user_ids} - application: {application_id}, '
+                    f'details: {details}')
+
+        self.notify('invites_created', invites)
+
+        return invites
+
     def get_invite_by_id(self, id_: int) -> Invite | None:
         # Attempt to get the requested invite.
         self.cursor.execute('SELECT * FROM `invites` WHERE `id` = ?', (id_,))
@@ -1076,6 +1564,19 @@ class Database:
 
         return invites
 
+    def get_user_invites_since(self, user_id: int, after_id: int, limit: int) -> list[Invite]:
+        invites: list[Invite] = []
+
+        # Get the invites after the given id, oldest first.
+        self.cursor.execute('''
+        SELECT * FROM `invites` WHERE `user_id` = ? AND `id` > ? ORDER BY `id` LIMIT ?
+        ''', (user_id, after_id, limit))
+
+        for row in self.cursor.fetchall():
+            invites.append(Utils.row_to_invite(row))
+
+        return invites
+
     def get_user_invites_for(self, user_id: int, application_id: int) -> list[Invite]:
         invites: list[Invite] = []
 
@@ -1164,7 +1665,7 @@ class Database:
 
         logger.info(f'Created photo entry: {filename} - subfolder: {subfolder}')
 
-        return True, {'details': 'Photo created successfully.'}
+        return True, {'details': 'Photo created successfully.', 'id': self.cursor.lastrowid}
 
     def get_photo_by_id(self, id_: int) -> Photo | None:
         # Attempt to get a photo from the provided id.
@@ -1176,6 +1677,61 @@ class Database:
 
         return Utils.row_to_photo(row)
 
+    def get_all_photos(self) -> list[Photo]:
+        photos: list[Photo] = []
+
+        # Fetch every photo.
+        self.cursor.execute('SELECT * FROM `photos`')
+
+        for row in self.cursor.fetchall():
+            photos.append(Utils.row_to_photo(row))
+
+        return photos
+
+    def get_photos_after(self, after_id: int, limit: int) -> list[Photo]:
+        photos: list[Photo] = []
+
+        # Fetch a page of photos by id, so walking the whole table never holds a long read.
+        self.cursor.execute('SELECT * FROM `photos` WHERE `id` > ? ORDER BY `id` LIMIT ?', (after_id, limit))
+
+        for row in self.cursor.fetchall():
+            photos.append(Utils.row_to_photo(row))
+
+        return photos
+
+    def get_profile_photo_ids(self) -> set[int]:
+        # Fetch the ids of every photo that is in use as a profile photo.
+        self.cursor.execute('SELECT DISTINCT `profile_photo_id` FROM `users`')
+
+        return {row['profile_photo_id'] for row in self.cursor.fetchall()}
+
+    def add_replaced_photo(self, photo_id: int):
+        # Replacing the same photo again only moves its date forward.
+        self.cursor.execute('INSERT OR REPLACE INTO `replaced_photos` (`photo_id`, `date`) VALUES (?, ?)',
+                            (photo_id, date.today()))
+
+        # Commit the changes.
+        self.connection.commit()
+
+    def get_replaced_photo_ids(self, before: date) -> set[int]:
+        # Fetch the ids of the profile photos that were replaced before the given date.
+        self.cursor.execute('SELECT `photo_id` FROM `replaced_photos` WHERE `date` < ?', (before,))
+
+        return {row['photo_id'] for row in self.cursor.fetchall()}
+
+    def delete_photos(self, ids: list[int]):
+        if not ids:
+            return
+
+        # Delete the photos in a single transaction.
+        self.cursor.executemany('DELETE FROM `photos` WHERE `id` = ?', [(id_,) for id_ in ids])
+        self.cursor.executemany('DELETE FROM `replaced_photos` WHERE `photo_id` = ?', [(id_,) for id_ in ids])
+
+        # Commit the changes.
+        self.connection.commit()
+
+        logger.info(f'Deleted photos: {ids}')
+
     def get_photo_by_location(self, filename: str, subfolder: str) -> Photo | None:
         # Attempt to get a photo based on a filename a subfolder.
         self.cursor.execute('SELECT * FROM `photos` WHERE `filename` = ? AND `subfolder` = ?', (filename, subfolder))
@@ -1200,7 +1756,11 @@ class Database:
         logger.info(f'Created iap: {title} - description: {description} for application: {application_id}, '
                     f'price: {price}, data: {data}')
 
-        return True, {'details': 'IAP created successfully.', 'id': self.cursor.lastrowid}
+        iap_id: int = self.cursor.lastrowid
+
+        self.notify('iap_created', application_id)
+
+        return True, {'details': 'IAP created successfully.', 'id': iap_id}
 
     def get_iap(self, id_: int) -> IAP | None:
         # Get a specific iap (from an id).
@@ -1212,6 +1772,17 @@ class Database:
 
         return Utils.row_to_iap(row)
 
+    def get_all_iaps(self) -> list[IAP]:
+        iaps: list[IAP] = []
+
+        # Fetch every iap of every application.
+        self.cursor.execute('SELECT * FROM `iaps`')
+
+        for row in self.cursor.fetchall():
+            iaps.append(Utils.row_to_iap(row))
+
+        return iaps
+
     def get_iaps_for_application(self, application_id: int) -> list[IAP]:
         # Gather all iaps for a specific application.
         iaps: list[IAP] = []
@@ -1223,20 +1794,82 @@ class Database:
 
         return iaps
 
-    def create_cloud_data(self, user_id: int, application_id: int, data: dict):
-        # Delete all previous cloud data entries for that user and application id.
-        self.cursor.execute('DELETE FROM `cloud_data` WHERE `user_id` = ? AND `application_id` = ?', (user_id, application_id))
+    def create_cloud_data(self, user_id: int, application_id: int, data: dict,
+                          expected_version: tuple[int, str] | None = None,
+                          require_existing: bool = False) -> tuple[bool, dict]:
+        # Compress the save, keeping its size and hash next to it.
+        serialized_data: bytes = json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        blob, encoding = Utils.compress_blob(serialized_data)
+        hash_: str = hashlib.sha256(serialized_data).hexdigest()
 
-        # Save the data.
-        self.cursor.execute('''
-        INSERT INTO `cloud_data` (`user_id`, `application_id`, `data`, `date`)
-        VALUES (?, ?, ?, ?)
-        ''', (user_id, application_id, json.dumps(data), date.today()))
+        if expected_version is None and not require_existing:
+            # Save the data, replacing the user's previous save for the application in place.
+            self.cursor.execute('''
+            INSERT INTO `cloud_data` (`user_id`, `application_id`, `data`, `date`, `blob`, `encoding`, `size`, `hash`,
+                                      `revision`)
+            VALUES (?, ?, '', ?, ?, ?, ?, ?, 1)
+            ON CONFLICT (`user_id`, `application_id`) DO UPDATE SET
+                `data` = '', `date` = excluded.`date`, `blob` = excluded.`blob`, `encoding` = excluded.`encoding`,
+                `size` = excluded.`size`, `hash` = excluded.`hash`, `revision` = `revision` + 1
+            ''', (user_id, application_id, date.today(), blob, encoding, len(serialized_data), hash_))
+        else:
+            # Only replace the save if it is still the version the client last saw. Checking and writing in one
+            # statement means two devices uploading at once can't both succeed.
+            condition: str = ' AND `revision` = ? AND `hash` = ?' if expected_version is not None else ''
+
+            self.cursor.execute(f'''
+            UPDATE `cloud_data` SET `data` = '', `date` = ?, `blob` = ?, `encoding` = ?, `size` = ?, `hash` = ?,
+                `revision` = `revision` + 1
+            WHERE `user_id` = ? AND `application_id` = ?{condition}
+            ''', (date.today(), blob, encoding, len(serialized_data), hash_, user_id, application_id)
+                                + (expected_version or ()))
+
+            if self.cursor.rowcount == 0:
+                return False, {'details': 'The cloud data has changed since it was last downloaded.'}
+
+        self.cursor.execute('SELECT `revision` FROM `cloud_data` WHERE `user_id` = ? AND `application_id` = ?',
+                            (user_id, application_id))
+        revision: int = self.cursor.fetchone()['revision']
 
         # Commit the changes.
         self.connection.commit()
 
-        logger.info(f'Created cloud data for user: {user_id} - application: {application_id}, data: {data}')
+        logger.info(f'Created cloud data for user: {user_id} - application: {application_id}, '
+                    f'size: {len(serialized_data)} ({len(blob)} compressed), hash: {hash_}, revision: {revision}')
+
+        return True, {'details': 'Cloud data saved successfully.', 'revision': revision, 'hash': hash_}
+
+    def compress_legacy_cloud_data(self, batch_size: int = 100):
+        converted: int = 0
+
+        # Convert a batch at a time so no single transaction holds the database for long.
+        while True:
+            self.cursor.execute('SELECT `id`, `data` FROM `cloud_data` WHERE `blob` IS NULL LIMIT ?', (batch_size,))
+            rows: list = self.cursor.fetchall()
+
+            if not rows:
+                break
+
+            updates: list = []
+
+            for row in rows:
+                serialized_data: bytes = json.dumps(json.loads(row['data']), sort_keys=True,
+                                                    separators=(',', ':')).encode('utf-8')
+                blob, encoding = Utils.compress_blob(serialized_data)
+                updates.append((blob, encoding, len(serialized_data), hashlib.sha256(serialized_data).hexdigest(),
+                                row['id']))
+
+            self.cursor.executemany('''
+            UPDATE `cloud_data` SET `data` = '', `blob` = ?, `encoding` = ?, `size` = ?, `hash` = ? WHERE `id` = ?
+            ''', updates)
+
+            # Commit the changes.
+            self.connection.commit()
+
+            converted += len(rows)
+
+        if converted:
+            logger.info(f'Compressed {converted} legacy cloud save(s).')
 
     def get_cloud_data(self, user_id: int, application_id: int) -> CloudData | None:
         self.cursor.execute('SELECT * FROM `cloud_data` WHERE `user_id` = ? AND `application_id` = ?', (user_id, application_id))
@@ -1315,6 +1948,19 @@ class Database:
 
         return records
 
+    def get_unacknowledged_iap_records_since(self, user_id: int, after_id: int, limit: int) -> list[IAPRecord]:
+        records: list[IAPRecord] = []
+
+        # Get the user's unacknowledged records in every application after the given id, oldest first.
+        self.cursor.execute('''
+        SELECT * FROM `iap_records` WHERE `user_id` = ? AND `acknowledged` = ? AND `id` > ? ORDER BY `id` LIMIT ?
+        ''', (user_id, False, after_id, limit))
+
+        for row in self.cursor.fetchall():
+            records.append(Utils.row_to_iap_record(row))
+
+        return records
+
     def get_iap_record(self, id_: int) -> IAPRecord | None:
         # Attempt to get the iap record.
         self.cursor.execute('SELECT * FROM `iap_records` WHERE `id` = ?', (id_,))
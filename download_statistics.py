@@ -0,0 +1,88 @@
+import atexit
+import threading
+import time
+from datetime import date
+
+from loguru import logger
+
+from database import Database
+from structures.application_version import ApplicationVersion
+from structures.download_statistic import DownloadStatistic
+
+
+class DownloadStatistics:
+    def __init__(self, database: Database, flush_interval: int):
+        self.database: Database = database
+        self.flush_interval: int = flush_interval
+        # Downloads that haven't been written yet, keyed by (application id, version id, platform, date).
+        self.pending: dict[tuple, int] = {}
+        self.lock = threading.Lock()
+        self.thread: threading.Thread | None = None
+
+    def initialize(self):
+        self.thread = threading.Thread(target=self.__run, name='download-statistics', daemon=True)
+        self.thread.start()
+
+        # Write whatever is left over when the server shuts down.
+        atexit.register(self.flush)
+
+    def record(self, application_id: int, version_id: int, platform: str):
+        key: tuple = (application_id, version_id, platform, date.today().isoformat())
+
+        with self.lock:
+            self.pending[key] = self.pending.get(key, 0) + 1
+
+    def record_version(self, version: ApplicationVersion):
+        self.record(version.application_id, version.id, version.platform)
+
+    def flush(self):
+        # Swap the counters out so downloads can keep being recorded while the batch is written.
+        with self.lock:
+            pending: dict[tuple, int] = self.pending
+            self.pending = {}
+
+        if not pending:
+            return
+
+        try:
+            self.database.add_download_statistics([key + (downloads,) for key, downloads in pending.items()])
+        except Exception as exception:
+            logger.error(f'Failed to write download statistics: {exception}')
+
+            # Put the counts back so they are retried with the next batch.
+            with self.lock:
+                for key, downloads in pending.items():
+                    self.pending[key] = self.pending.get(key, 0) + downloads
+
+            return
+
+        logger.info(f'Wrote download statistics - rows: {len(pending)}, downloads: {sum(pending.values())}')
+
+    def get(self, application_id: int, start_date: date, end_date: date) -> list[DownloadStatistic]:
+        statistics: dict[tuple, DownloadStatistic] = {
+            (statistic.version_id, statistic.platform, statistic.date.isoformat()): statistic
+            for statistic in self.database.get_download_statistics(application_id, start_date, end_date)
+        }
+
+        # Include the downloads that haven't been written yet so the numbers are current.
+        with self.lock:
+            pending: dict[tuple, int] = dict(self.pending)
+
+        for (pending_application_id, version_id, platform, date_), downloads in pending.items():
+            if pending_application_id != application_id or not start_date.isoformat() <= date_ <= end_date.isoformat():
+                continue
+
+            key: tuple = (version_id, platform, date_)
+
+            if key in statistics:
+                statistics[key].downloads += downloads
+            else:
+                statistics[key] = DownloadStatistic(application_id, version_id, platform, date_, downloads)
+
+        return sorted(statistics.values(), key=lambda statistic: (statistic.date, statistic.version_id,
+                                                                  statistic.platform))
+
+    def __run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
@@ -0,0 +1,100 @@
+import json
+import queue
+import threading
+
+from loguru import logger
+
+from database import Database
+
+
+class EventBroker:
+    def __init__(self, max_subscribers: int, queue_size: int, keepalive_seconds: int):
+        # Every open stream holds a server thread, so their number is capped.
+        self.max_subscribers: int = max_subscribers
+        self.queue_size: int = queue_size
+        self.keepalive_seconds: int = keepalive_seconds
+        self.subscribers: dict[int, set[queue.Queue]] = {}
+        self.subscriber_count: int = 0
+        self.lock = threading.Lock()
+
+    def initialize(self, database: Database):
+        database.add_listener('friend_request_created', self.on_friend_request_created)
+        database.add_listener('friend_added', self.on_friend_added)
+        database.add_listener('friend_removed', self.on_friend_removed)
+        database.add_listener('invite_created', self.on_invite_created)
+        database.add_listener('invites_created', self.on_invites_created)
+
+    def subscribe(self, user_id: int) -> queue.Queue | None:
+        with self.lock:
+            if self.subscriber_count >= self.max_subscribers:
+                logger.warning(f'Rejected an event stream; all {self.max_subscribers} subscriber slots are in use.')
+
+                return None
+
+            subscriber: queue.Queue = queue.Queue(self.queue_size)
+            self.subscribers.setdefault(user_id, set()).add(subscriber)
+            self.subscriber_count += 1
+
+            return subscriber
+
+    def unsubscribe(self, user_id: int, subscriber: queue.Queue):
+        with self.lock:
+            subscribers: set[queue.Queue] | None = self.subscribers.get(user_id)
+
+            # This can be called more than once for the same stream; only the first call counts.
+            if subscribers is None or subscriber not in subscribers:
+                return
+
+            subscribers.remove(subscriber)
+            self.subscriber_count -= 1
+
+            if not subscribers:
+                del self.subscribers[user_id]
+
+    def publish(self, user_id: int, event: str, data: dict):
+        with self.lock:
+            subscribers: list[queue.Queue] = list(self.subscribers.get(user_id, []))
+
+        for subscriber in subscribers:
+            # A client that has stopped reading loses its oldest events rather than holding up everyone else.
+            while True:
+                try:
+                    subscriber.put_nowait((event, data))
+                    break
+                except queue.Full:
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def stream(self, subscriber: queue.Queue):
+        # Ask the client to wait a few seconds before reconnecting if the stream drops.
+        yield 'retry: 5000\n\n'
+
+        while True:
+            try:
+                event, data = subscriber.get(timeout=self.keepalive_seconds)
+            except queue.Empty:
+                # Comments keep proxies from closing an idle connection.
+                yield ': keepalive\n\n'
+                continue
+
+            yield f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+    def on_friend_request_created(self, id_: int, user_id: int, from_user_id: int):
+        self.publish(user_id, 'friend_request', {'id': id_, 'from_user_id': from_user_id})
+
+    def on_friend_added(self, user_id: int, other_user_id: int):
+        self.publish(user_id, 'friend_added', {'user_id': other_user_id})
+        self.publish(other_user_id, 'friend_added', {'user_id': user_id})
+
+    def on_friend_removed(self, user_id: int, other_user_id: int):
+        self.publish(user_id, 'friend_removed', {'user_id': other_user_id})
+        self.publish(other_user_id, 'friend_removed', {'user_id': user_id})
+
+    def on_invite_created(self, id_: int, user_id: int, from_user_id: int, application_id: int):
+        self.publish(user_id, 'invite', {'id': id_, 'from_user_id': from_user_id, 'application_id': application_id})
+
+    def on_invites_created(self, invites: list):
+        for invite in invites:
+            self.on_invite_created(invite.id, invite.user_id, invite.from_user_id, invite.application_id)
@@ -1,24 +1,35 @@
+import hashlib
 import os
+import time
 from os import path
 
+from loguru import logger
+
 from database import Database
 from structures.application_version import ApplicationVersion
 from structures.photo import Photo
 
 
 class FileManager:
-    def __init__(self, database: Database, base_directory: str, photos_directory: str, applications_directory: str):
+    def __init__(self, database: Database, base_directory: str, photos_directory: str, applications_directory: str,
+                 uploads_directory: str, chunks_directory: str, quarantine_directory: str):
         # Calculate all the paths.
         self.database: Database = database
         self.base_directory = path.join(os.getcwd(), base_directory)
         self.photos_directory: str = path.join(self.base_directory, photos_directory)
         self.applications_directory: str = path.join(self.base_directory, applications_directory)
+        self.uploads_directory: str = path.join(self.base_directory, uploads_directory)
+        self.chunks_directory: str = path.join(self.base_directory, chunks_directory)
+        self.quarantine_directory: str = path.join(self.base_directory, quarantine_directory)
 
     def initialize(self):
         # Ensure that all the required data directories exist.
         os.makedirs(self.base_directory, exist_ok=True)
         os.makedirs(self.photos_directory, exist_ok=True)
         os.makedirs(self.applications_directory, exist_ok=True)
+        os.makedirs(self.uploads_directory, exist_ok=True)
+        os.makedirs(self.chunks_directory, exist_ok=True)
+        os.makedirs(self.quarantine_directory, exist_ok=True)
 
     def get_photo_filepath(self, image_id) -> str | None:
         # Get the image's database entry.
@@ -27,7 +38,13 @@ class FileManager:
         if image is None:
             return None
 
-        return path.join(self.photos_directory, image.subfolder, image.filename)
+        return self.get_photo_filepath_for(image)
+
+    def get_photo_filepath_for(self, photo: Photo) -> str:
+        return self.resolve_filepath(
+            self.get_sharded_photo_filepath(photo.filename),
+            self.get_legacy_photo_filepath(photo.subfolder, photo.filename)
+        )
 
     def get_version_filepath(self, version_id) -> str | None:
         # Get the version.
@@ -42,13 +59,146 @@ class FileManager:
         if application is None:
             return None
 
-        return path.join(self.applications_directory, application.package_name, version.filename)
+        return self.resolve_version_filepath(application.package_name, version.filename)
+
+    def get_all_version_filepaths(self) -> list[str]:
+        filepaths: list[str] = []
+        package_names: dict = {}
+
+        for version in self.database.get_all_application_versions():
+            # Look up each application only once.
+            if version.application_id not in package_names:
+                application = self.database.get_application(version.application_id)
+                package_names[version.application_id] = application.package_name if application else None
+
+            if package_names[version.application_id] is not None:
+                filepaths.append(self.resolve_version_filepath(package_names[version.application_id],
+                                                               version.filename))
+
+        return filepaths
 
     def create_application_folder(self, package_name: str):
         os.makedirs(path.join(self.applications_directory, package_name), exist_ok=True)
 
     def generate_photo_filepath(self, subfolder: str, filename: str) -> str:
-        return path.join(self.photos_directory, subfolder, filename)
+        # Photos are sharded by filename; the subfolder is only kept as a label in the database.
+        filepath: str = self.get_sharded_photo_filepath(filename)
+        os.makedirs(path.dirname(filepath), exist_ok=True)
+
+        return filepath
 
     def generate_version_filepath(self, package_name: str, filename: str) -> str:
+        filepath: str = self.get_sharded_version_filepath(package_name, filename)
+        os.makedirs(path.dirname(filepath), exist_ok=True)
+
+        return filepath
+
+    def resolve_version_filepath(self, package_name: str, filename: str) -> str:
+        return self.resolve_filepath(
+            self.get_sharded_version_filepath(package_name, filename),
+            self.get_legacy_version_filepath(package_name, filename)
+        )
+
+    def get_sharded_photo_filepath(self, filename: str) -> str:
+        return path.join(self.photos_directory, self.get_shard(filename), filename)
+
+    def get_sharded_version_filepath(self, package_name: str, filename: str) -> str:
+        return path.join(self.applications_directory, package_name, self.get_shard(filename), filename)
+
+    def get_legacy_photo_filepath(self, subfolder: str, filename: str) -> str:
+        return path.join(self.photos_directory, subfolder, filename)
+
+    def get_legacy_version_filepath(self, package_name: str, filename: str) -> str:
         return path.join(self.applications_directory, package_name, filename)
+
+    @staticmethod
+    def get_shard(filename: str) -> str:
+        # Spread files over 65,536 directories (two levels of 256) so no single directory gets huge.
+        digest: str = hashlib.sha1(filename.encode('utf-8')).hexdigest()
+
+        return path.join(digest[:2], digest[2:4])
+
+    @staticmethod
+    def resolve_filepath(sharded_filepath: str, legacy_filepath: str) -> str:
+        # Files that have not been migrated yet are still in the legacy layout.
+        if not path.exists(sharded_filepath) and path.exists(legacy_filepath):
+            return legacy_filepath
+
+        return sharded_filepath
+
+    def migrate_to_sharded_layout(self, batch_size: int, pause_seconds: float) -> dict:
+        # Group the files by the legacy directory they live in, so each directory is only listed once.
+        directories: dict = {}
+
+        for photo in self.database.get_all_photos():
+            legacy_directory: str = path.dirname(self.get_legacy_photo_filepath(photo.subfolder, photo.filename))
+            directories.setdefault(legacy_directory, {})[photo.filename] = path.dirname(
+                self.generate_photo_filepath(photo.subfolder, photo.filename))
+
+        package_names: dict = {}
+
+        for version in self.database.get_all_application_versions():
+            if version.application_id not in package_names:
+                application = self.database.get_application(version.application_id)
+                package_names[version.application_id] = application.package_name if application else None
+
+            package_name: str | None = package_names[version.application_id]
+
+            if package_name is None:
+                continue
+
+            legacy_directory: str = path.dirname(self.get_legacy_version_filepath(package_name, version.filename))
+            directories.setdefault(legacy_directory, {})[version.filename] = path.dirname(
+                self.generate_version_filepath(package_name, version.filename))
+
+        moved: int = 0
+
+        for legacy_directory, destinations in directories.items():
+            if not path.isdir(legacy_directory):
+                continue
+
+            # Sort the directory's files into their owners, moving derived files (variants, manifests, ...) before
+            # the file they belong to. The server resolves a file by its own location, so while a file is still in
+            # the legacy layout its derived files are simply treated as missing rather than served from elsewhere.
+            siblings: list = []
+            owners: list = []
+
+            with os.scandir(legacy_directory) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+
+                    owner: str = entry.name
+
+                    while owner not in destinations and '.' in owner:
+                        owner = owner.rsplit('.', 1)[0]
+
+                    if owner == entry.name:
+                        owners.append((entry.name, destinations[owner]))
+                    elif owner in destinations:
+                        siblings.append((entry.name, destinations[owner]))
+
+            for name, destination in siblings + owners:
+                # Renaming within the same filesystem is atomic, so the server can keep running during the migration.
+                os.replace(path.join(legacy_directory, name), path.join(destination, name))
+                moved += 1
+
+                if moved % batch_size == 0:
+                    logger.info(f'Migrated {moved} file(s) to the sharded layout.')
+                    time.sleep(pause_seconds)
+
+        logger.info(f'Finished migrating to the sharded layout - moved {moved} file(s).')
+
+        return {'moved': moved}
+
+    @staticmethod
+    def get_photo_variant_filepath(photo_filepath: str, size: int) -> str:
+        return f'{photo_filepath}.{size}.webp'
+
+    def get_chunk_filepath(self, chunk_hash: str) -> str:
+        # Chunks are spread over subdirectories by their hash prefix to keep directories small.
+        return path.join(self.chunks_directory, chunk_hash[:2], chunk_hash)
+
+    @staticmethod
+    def get_manifest_filepath(version_filepath: str) -> str:
+        return version_filepath + '.manifest.json'
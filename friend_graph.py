@@ -0,0 +1,148 @@
+import threading
+from array import array
+from bisect import bisect_left, insort
+
+from loguru import logger
+
+from database import Database
+
+
+class FriendGraph:
+    def __init__(self, database: Database, compaction_threshold: int):
+        self.database: Database = database
+        self.compaction_threshold: int = compaction_threshold
+        # Friendships in compressed sparse row form: the friends of the user in row n are the sorted ids in
+        # neighbors[offsets[n]:offsets[n + 1]].
+        self.rows: dict[int, int] = {}
+        self.offsets: array = array('q', [0])
+        self.neighbors: array = array('q')
+        # Users whose friends changed since the last compaction keep their own sorted array until the next one.
+        self.changed: dict[int, array] = {}
+        self.lock = threading.Lock()
+
+    def initialize(self):
+        adjacency: dict[int, array] = {}
+
+        # The friends table stores both directions of every friendship, sorted by user.
+        for user_id, friend_id in self.database.get_friend_pairs():
+            adjacency.setdefault(user_id, array('q')).append(friend_id)
+
+        with self.lock:
+            self.__build(adjacency)
+
+        logger.info(f'Built friend graph - users: {len(self.rows)}, friendships: {len(self.neighbors) // 2}')
+
+        # Keep the graph up to date as friendships change.
+        self.database.add_listener('friend_added', self.add_friendship)
+        self.database.add_listener('friend_removed', self.remove_friendship)
+
+    def add_friendship(self, user_id: int, other_user_id: int):
+        with self.lock:
+            for a, b in [(user_id, other_user_id), (other_user_id, user_id)]:
+                friends: array = array('q', self.__get_friends(a))
+                index: int = bisect_left(friends, b)
+
+                if index == len(friends) or friends[index] != b:
+                    insort(friends, b)
+
+                self.changed[a] = friends
+
+            self.__compact_if_needed()
+
+    def remove_friendship(self, user_id: int, other_user_id: int):
+        with self.lock:
+            for a, b in [(user_id, other_user_id), (other_user_id, user_id)]:
+                friends: array = array('q', self.__get_friends(a))
+                index: int = bisect_left(friends, b)
+
+                if index < len(friends) and friends[index] == b:
+                    del friends[index]
+
+                self.changed[a] = friends
+
+            self.__compact_if_needed()
+
+    def get_friends(self, user_id: int) -> list[int]:
+        with self.lock:
+            return self.__get_friends(user_id).tolist()
+
+    def get_mutual_friends(self, user_id: int, other_user_id: int) -> list[int]:
+        with self.lock:
+            return self.intersect(self.__get_friends(user_id), self.__get_friends(other_user_id))
+
+    def get_suggestions(self, user_id: int, limit: int) -> list[tuple[int, int]]:
+        counts: dict[int, int] = {}
+
+        with self.lock:
+            friends: array = self.__get_friends(user_id)
+
+            # Everyone a friend is friends with is a candidate, scored by how many friends they share with the user.
+            for friend_id in friends:
+                for candidate_id in self.__get_friends(friend_id):
+                    counts[candidate_id] = counts.get(candidate_id, 0) + 1
+
+        # Leave out the user and the people they are already friends with.
+        counts.pop(user_id, None)
+
+        for friend_id in friends:
+            counts.pop(friend_id, None)
+
+        return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    @staticmethod
+    def intersect(a, b) -> list[int]:
+        # Both arrays are sorted, so walk them together.
+        result: list[int] = []
+        i: int = 0
+        j: int = 0
+
+        while i < len(a) and j < len(b):
+            if a[i] == b[j]:
+                result.append(a[i])
+                i += 1
+                j += 1
+            elif a[i] < b[j]:
+                i += 1
+            else:
+                j += 1
+
+        return result
+
+    def __get_friends(self, user_id: int):
+        if user_id in self.changed:
+            return self.changed[user_id]
+
+        row: int | None = self.rows.get(user_id)
+
+        if row is None:
+            return array('q')
+
+        return self.neighbors[self.offsets[row]:self.offsets[row + 1]]
+
+    def __compact_if_needed(self):
+        if len(self.changed) < self.compaction_threshold:
+            return
+
+        # Fold the changed users back into the compact arrays.
+        adjacency: dict[int, array] = {user_id: self.__get_friends(user_id) for user_id in self.rows}
+        adjacency.update(self.changed)
+
+        self.__build(adjacency)
+
+    def __build(self, adjacency: dict[int, array]):
+        rows: dict[int, int] = {}
+        offsets: array = array('q', [0])
+        neighbors: array = array('q')
+
+        for user_id, friends in adjacency.items():
+            if not friends:
+                continue
+
+            rows[user_id] = len(offsets) - 1
+            neighbors.extend(sorted(friends))
+            offsets.append(len(neighbors))
+
+        self.rows = rows
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.changed = {}
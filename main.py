@@ -1,15 +1,20 @@
+import hashlib
 import json
+import mimetypes
 import os
+import re
 import sys
 from time import strftime
+from urllib.parse import quote, urlencode
 
 from dotenv import load_dotenv
 from datetime import datetime
 from datetime import date
+from datetime import timedelta
 from loguru import logger
 
 # Flask-related imports.
-from flask import Flask, request, send_file
+from flask import Flask, Response, request, send_file
 from flask_restful import Api
 from werkzeug.utils import secure_filename
 
@@ -19,7 +24,21 @@ from database_utils import DatabaseUtils
 from email_manager import EmailManager
 from api_resource import APIResource
 from email_utils import EmailUtils
+from event_broker import EventBroker
+from artifact_compressor import ArtifactCompressor
+from catalog_index import CatalogIndex
+from catalog_snapshot import CatalogSnapshot
+from download_statistics import DownloadStatistics
 from file_manager import FileManager
+from friend_graph import FriendGraph
+from manifest_manager import ManifestManager
+from photo_cache import CachedPhoto, PhotoCache
+from photo_processor import PhotoProcessor
+from presence_manager import PresenceManager
+from response_compressor import ResponseCompressor
+from transfer_scheduler import TransferScheduler
+from upload_manager import UploadManager
+from url_signer import UrlSigner
 from structures.application_session import ApplicationSession
 from structures.friend import Friend
 from structures.friend_request import FriendRequest
@@ -38,7 +57,44 @@ from utils import Utils
 BASE_DIRECTORY: str = 'data'
 PHOTOS_DIRECTORY: str = 'photos'
 APPLICATIONS_DIRECTORY: str = 'applications'
+UPLOADS_DIRECTORY: str = 'uploads'
+CHUNKS_DIRECTORY: str = 'chunks'
+QUARANTINE_DIRECTORY: str = 'quarantine'
 ALLOWED_IMAGE_TYPES: list = ['png', 'jpg', 'jpeg']
+MAX_UPLOAD_SIZE: int = 16 * 1024 * 1024 * 1024
+MAX_UPLOAD_CHUNK_SIZE: int = 64 * 1024 * 1024
+UPLOAD_EXPIRY_SECONDS: int = 24 * 60 * 60
+MANIFEST_CHUNK_SIZE: int = 4 * 1024 * 1024
+MANIFEST_WORKERS: int = 2
+COMPRESSION_MINIMUM_SAVINGS: float = 0.1
+PHOTO_VARIANT_SIZES: list = [64, 128, 512]
+PHOTO_WORKERS: int = 2
+PHOTO_CACHE_SIZE: int = 64 * 1024 * 1024
+PHOTO_CACHE_ITEM_SIZE: int = 2 * 1024 * 1024
+PHOTO_CACHE_CONTROL: str = 'private, max-age=31536000, immutable'
+MAX_PAGE_SIZE: int = 50
+MAX_BATCH_USERS: int = 100
+MAX_BATCH_INVITES: int = 50
+MAX_BATCH_FRIEND_REQUESTS: int = 100
+FRIEND_GRAPH_COMPACTION_THRESHOLD: int = 1000
+MAX_FRIEND_SUGGESTIONS: int = 50
+PRESENCE_TTL: int = 90
+PRESENCE_SWEEP_INTERVAL: int = 15
+PRESENCE_PERSIST_INTERVAL: int = 5 * 60
+MAX_EVENT_SUBSCRIBERS: int = 256
+EVENT_QUEUE_SIZE: int = 100
+EVENT_KEEPALIVE_SECONDS: int = 15
+INBOX_PAGE_SIZE: int = 100
+COMPRESSION_MINIMUM_SIZE: int = 1024
+COMPRESSION_EXCLUDED_PATHS: list = ['/api/application/versions/download', '/api/application/versions/chunk',
+                                    '/api/application/versions/signed-download', '/api/photo/get']
+SIGNED_URL_LIFETIME: int = 15 * 60
+MAX_CONCURRENT_TRANSFERS: int = 32
+TRANSFER_GLOBAL_RATE: int = 100 * 1024 * 1024
+TRANSFER_CONNECTION_RATE: int = 10 * 1024 * 1024
+TRANSFER_RETRY_AFTER: int = 5
+DOWNLOAD_STATISTICS_FLUSH_INTERVAL: int = 30
+DOWNLOAD_STATISTICS_DEFAULT_DAYS: int = 30
 
 
 # Variables.
@@ -46,6 +102,21 @@ email_manager: EmailManager | None = None
 database: Database | None = None
 database_utils: DatabaseUtils | None = None
 file_manager: FileManager | None = None
+upload_manager: UploadManager | None = None
+manifest_manager: ManifestManager | None = None
+artifact_compressor: ArtifactCompressor | None = None
+photo_processor: PhotoProcessor | None = None
+photo_cache: PhotoCache | None = None
+catalog_index: CatalogIndex | None = None
+catalog_snapshot: CatalogSnapshot | None = None
+response_compressor: ResponseCompressor | None = None
+url_signer: UrlSigner | None = None
+transfer_scheduler: TransferScheduler | None = None
+download_statistics: DownloadStatistics | None = None
+friend_graph: FriendGraph | None = None
+presence_manager: PresenceManager | None = None
+event_broker: EventBroker | None = None
+download_offload_prefix: str | None = None
 app = None
 api = None
 
@@ -209,7 +280,38 @@ class GetUser(APIResource):
         if not target_user:
             return {'details': 'The specified user does not exist.'}, 400
 
-        return target_user.into_dict(user.is_or_admin(target_user.id)), 200
+        return self.conditional_response(target_user.into_dict(user.is_or_admin(target_user.id)))
+
+
+class GetUsers(APIResource):
+    required_parameters = ['ids']
+
+    def get(self):
+        missing, parameters = self.missing_parameters()
+
+        if missing:
+            return {'missing_parameters': parameters}, 400
+
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the parameters, dropping duplicates but keeping the order.
+        ids: list[int] = list(dict.fromkeys(Utils.safe_int_cast(id_) for id_ in request.form.get('ids').split(',')
+                                            if id_.strip()))
+
+        if len(ids) > MAX_BATCH_USERS:
+            return {'details': f'At most {MAX_BATCH_USERS} users can be requested at once.'}, 400
+
+        # Get the requested users.
+        users = database.get_users_by_ids(ids)
+        found_ids: set = {target_user.id for target_user in users}
+
+        return self.conditional_response({
+            'users': [target_user.into_dict(user.is_or_admin(target_user.id)) for target_user in users],
+            'missing': [id_ for id_ in ids if id_ not in found_ids]
+        })
 
 
 class AuthenticateSession(APIResource):
@@ -326,13 +428,105 @@ class GetApplication(APIResource):
         # Get the parameters.
         application_id: int = Utils.safe_int_cast(request.form.get('application_id'))
 
+        # The application only changes along with the catalog, so unchanged clients can be answered right away.
+        etag: str = catalog_snapshot.token('application', application_id, user.id)
+        not_modified = self.not_modified_response(etag)
+
+        if not_modified:
+            return not_modified
+
         # Get the application.
         application = database.get_application(application_id)
 
         if not application:
             return {'details': 'The specified application does not exist.'}, 400
 
-        return application.into_dict(user.administrator or user.id in application.owners), 200
+        return self.conditional_response(application.into_dict(user.administrator or user.id in application.owners),
+                                         etag=etag)
+
+
+class SearchApplications(APIResource):
+    required_parameters = ['query']
+
+    def get(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the parameters.
+        query: str = request.form.get('query')
+
+        # Get the optional parameters.
+        page: int = max(1, Utils.safe_int_cast(request.form.get('page'), 1)) if 'page' in request.form else 1
+        per_page: int = min(MAX_PAGE_SIZE, max(1, Utils.safe_int_cast(request.form.get('per_page'), MAX_PAGE_SIZE))) \
+            if 'per_page' in request.form \
+            else MAX_PAGE_SIZE
+
+        # Search the catalog.
+        applications, total = database.search_applications(query, per_page, (page - 1) * per_page)
+
+        return {'applications': Utils.serialize(applications), 'total': total, 'page': page, 'per_page': per_page}, 200
+
+
+class BrowseApplications(APIResource):
+    def get(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the optional parameters.
+        filters: dict = {
+            facet: request.form.get(parameter).split(',')
+            for facet, parameter in [('platform', 'platforms'), ('genre', 'genres'), ('tag', 'tags')]
+            if request.form.get(parameter)
+        }
+        on_sale: bool = Utils.safe_bool_cast(request.form.get('on_sale')) if 'on_sale' in request.form else False
+        page: int = max(1, Utils.safe_int_cast(request.form.get('page'), 1)) if 'page' in request.form else 1
+        per_page: int = min(MAX_PAGE_SIZE, max(1, Utils.safe_int_cast(request.form.get('per_page'), MAX_PAGE_SIZE))) \
+            if 'per_page' in request.form \
+            else MAX_PAGE_SIZE
+
+        # Intersect the facets.
+        result: int = catalog_index.query(filters)
+
+        if on_sale:
+            result &= CatalogIndex.to_bitset(database.get_on_sale_application_ids(date.today()))
+
+        # Load only the requested page of applications.
+        ids: list[int] = CatalogIndex.to_ids(result)
+        applications = database.get_applications_by_ids(ids[(page - 1) * per_page:page * per_page])
+
+        return {
+            'applications': Utils.serialize(applications),
+            'total': len(ids),
+            'page': page,
+            'per_page': per_page,
+            'facets': catalog_index.count_facets(result)
+        }, 200
+
+
+class GetCatalog(APIResource):
+    def get(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the current snapshot; it is only rebuilt after the catalog changes.
+        data, etag = catalog_snapshot.get()
+
+        # Clients that already have this version don't need it again (compressed copies carry a weak ETag).
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = Response(data, mimetype='application/json')
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+
+        return response
 
 
 class UpdateApplicationVersion(APIResource):
@@ -396,10 +590,48 @@ class GetApplicationVersions(APIResource):
         else:
             versions = database.get_application_versions(application_id)
 
-        return {'versions': Utils.serialize(versions)}, 200
+        return self.conditional_response({'versions': Utils.serialize(versions)})
+
+
+class VersionDownloadResource(APIResource):
+    @staticmethod
+    def send_version_file(version_filepath: str) -> Response:
+        mimetype: str = mimetypes.guess_type(version_filepath)[0] or 'application/octet-stream'
+
+        def build() -> Response:
+            if download_offload_prefix:
+                # Let the reverse proxy send the original file itself. nginx drops Content-Encoding from the
+                # upstream response on an X-Accel-Redirect, so a precompressed variant would reach the client as
+                # if it were the raw file.
+                response = Response(mimetype=mimetype)
+                response.headers['X-Accel-Redirect'] = download_offload_prefix + quote(
+                    os.path.relpath(version_filepath, file_manager.base_directory).replace(os.sep, '/'))
+
+                return response
+
+            # Serve a precompressed variant if the client accepts one.
+            filepath, encoding = artifact_compressor.select_variant(version_filepath,
+                                                                    request.headers.get('Accept-Encoding'))
+            response = send_file(filepath, mimetype)
+            response.headers['Vary'] = 'Accept-Encoding'
+
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+
+            return response
 
+        # Downloads share a bounded number of transfer slots and bandwidth, so they can't starve the API.
+        return transfer_scheduler.dispatch(build)
 
-class DownloadApplicationVersion(APIResource):
+    @staticmethod
+    def is_full_download(response: Response) -> bool:
+        # Only full downloads count; 304s transfer nothing, and range requests resume a download that was already
+        # counted. The Range header is checked too, as an offloaded download is always a 200 here and the reverse
+        # proxy serves the range itself.
+        return response.status_code == 200 and 'Range' not in request.headers
+
+
+class DownloadApplicationVersion(VersionDownloadResource):
     required_parameters = ['version_id']
 
     def get(self):
@@ -426,7 +658,183 @@ class DownloadApplicationVersion(APIResource):
         if not database_utils.user_owns(user.id, version.application_id):
             return {'details': 'You do not own this application.'}, 403
 
-        return send_file(file_manager.get_version_filepath(version_id))
+        response = self.send_version_file(file_manager.get_version_filepath(version_id))
+
+        if self.is_full_download(response):
+            download_statistics.record_version(version)
+
+        return response
+
+
+class SignVersionDownload(APIResource):
+    required_parameters = ['version_id']
+
+    def post(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the parameters.
+        version_id: int = Utils.safe_int_cast(request.form.get('version_id'))
+
+        # Get the version.
+        version = database.get_application_version_by_id(version_id)
+
+        if not version:
+            return {'details': 'The specified version does not exist.'}, 400
+
+        # Verify that the user owns the specified application.
+        if not database_utils.user_owns(user.id, version.application_id):
+            return {'details': 'You do not own this application.'}, 403
+
+        # Get the application.
+        application = database.get_application(version.application_id)
+
+        # Everything the download needs goes into the signed URL, so serving it requires no database access.
+        parameters: dict = url_signer.sign({
+            'version_id': version.id,
+            'application_id': version.application_id,
+            'platform': version.platform,
+            'package_name': application.package_name,
+            'filename': version.filename
+        })
+
+        return {
+            'url': request.url_root.rstrip('/') + '/api/application/versions/signed-download?' + urlencode(parameters),
+            'expires': Utils.safe_int_cast(parameters['expires'])
+        }, 200
+
+
+class SignedDownloadApplicationVersion(VersionDownloadResource):
+    def get(self):
+        # The signature is the credential; no session is needed.
+        valid, details = url_signer.verify(request.args.to_dict())
+
+        if not valid:
+            return {'details': details}, 403
+
+        response = self.send_version_file(file_manager.resolve_version_filepath(request.args.get('package_name'),
+                                                                                request.args.get('filename')))
+
+        if self.is_full_download(response):
+            download_statistics.record(Utils.safe_int_cast(request.args.get('application_id')),
+                                       Utils.safe_int_cast(request.args.get('version_id')),
+                                       request.args.get('platform'))
+
+        return response
+
+
+class GetDownloadStatistics(APIResource):
+    required_parameters = ['application_id']
+
+    def get(self):
+        missing, parameters = self.missing_parameters()
+
+        if missing:
+            return {'missing_parameters': parameters}, 400
+
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the parameters.
+        application_id: int = Utils.safe_int_cast(request.form.get('application_id'))
+
+        # Get the optional parameters.
+        end_date: date = datetime.strptime(request.form.get('end_date'), '%Y-%m-%d').date() \
+            if 'end_date' in request.form \
+            else date.today()
+        start_date: date = datetime.strptime(request.form.get('start_date'), '%Y-%m-%d').date() \
+            if 'start_date' in request.form \
+            else end_date - timedelta(days=DOWNLOAD_STATISTICS_DEFAULT_DAYS - 1)
+
+        # Get the application.
+        application = database.get_application(application_id)
+
+        if not application:
+            return {'details': 'The specified application does not exist.'}, 400
+
+        # Ensure that the user is an owner of this application.
+        if not (user.id in application.owners or user.administrator):
+            return {'details': 'This is not your application; you cannot view its statistics.'}, 403
+
+        statistics = download_statistics.get(application_id, start_date, end_date)
+
+        return {
+            'statistics': Utils.serialize(statistics),
+            'total': sum(statistic.downloads for statistic in statistics)
+        }, 200
+
+
+class GetVersionManifest(APIResource):
+    required_parameters = ['version_id']
+
+    def get(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the parameters.
+        version_id: int = Utils.safe_int_cast(request.form.get('version_id'))
+
+        # Get the version.
+        version = database.get_application_version_by_id(version_id)
+
+        if not version:
+            return {'details': 'The specified version does not exist.'}, 400
+
+        # Verify that the user owns the specified application.
+        if not database_utils.user_owns(user.id, version.application_id):
+            return {'details': 'You do not own this application.'}, 403
+
+        version_filepath: str = file_manager.get_version_filepath(version_id)
+
+        if not manifest_manager.has_manifest(version_filepath):
+            return {'details': 'The specified version does not have a manifest.'}, 400
+
+        return send_file(file_manager.get_manifest_filepath(version_filepath), 'application/json')
+
+
+class DownloadVersionChunk(APIResource):
+    required_parameters = ['version_id', 'chunk']
+
+    def get(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the parameters.
+        version_id: int = Utils.safe_int_cast(request.form.get('version_id'))
+        chunk_hash: str = request.form.get('chunk').lower()
+
+        # Ensure that the chunk hash is well-formed (it is used to build a file path).
+        if not re.fullmatch('[0-9a-f]{64}', chunk_hash):
+            return {'details': 'The specified chunk hash is invalid.'}, 400
+
+        # Get the version.
+        version = database.get_application_version_by_id(version_id)
+
+        if not version:
+            return {'details': 'The specified version does not exist.'}, 400
+
+        # Verify that the user owns the specified application.
+        if not database_utils.user_owns(user.id, version.application_id):
+            return {'details': 'You do not own this application.'}, 403
+
+        # Ensure that the chunk actually belongs to this version.
+        version_filepath: str = file_manager.get_version_filepath(version_id)
+
+        if not (manifest_manager.has_manifest(version_filepath)
+                and manifest_manager.manifest_contains(version_filepath, chunk_hash)):
+            return {'details': 'The specified chunk is not part of this version.'}, 400
+
+        # Chunks are content-addressed, so they can be cached forever.
+        return transfer_scheduler.dispatch(lambda: send_file(file_manager.get_chunk_filepath(chunk_hash),
+                                                            'application/octet-stream', max_age=31536000))
 
 
 class CreateVersion(APIResource):
@@ -487,11 +895,210 @@ class CreateVersion(APIResource):
         version_file = request.files['file']
 
         # Save the version file.
-        version_file.save(file_manager.generate_version_filepath(application.package_name, filename))
+        version_filepath: str = file_manager.generate_version_filepath(application.package_name, filename)
+        version_file.save(version_filepath)
+
+        # Build the per-file manifest if the developer asked for incremental installs.
+        if Utils.safe_bool_cast(request.form.get('manifest')):
+            manifest_manager.queue_manifest(version_filepath)
+
+        # Produce the precompressed download variants.
+        artifact_compressor.queue_file(version_filepath)
+
+        return response, 200
+
+
+class OpenVersionUpload(APIResource):
+    required_parameters = ['application_id', 'name', 'platform', 'release_date', 'filename', 'executable', 'size',
+                           'chunk_size']
+
+    def post(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        if not user.has_developer_permissions():
+            return {'details': 'You are not a developer!'}, 403
+
+        # Get the parameters.
+        application_id: int = Utils.safe_int_cast(request.form.get('application_id'))
+        name: str = request.form.get('name')
+        platform: str = request.form.get('platform')
+        release_date: date = datetime.strptime(request.form.get('release_date'), '%Y-%m-%d').date()
+        filename: str = secure_filename(Utils.generate_uuid4() + '_' + request.form.get('filename'))
+        executable: str = request.form.get('executable')
+        size: int = Utils.safe_int_cast(request.form.get('size'), -1)
+        chunk_size: int = Utils.safe_int_cast(request.form.get('chunk_size'))
+
+        # Ensure that the application exists.
+        application = database.get_application(application_id)
+
+        if not application:
+            return {'details': 'The specified application does not exist.'}, 400
+
+        # Ensure that the user is an owner of this application.
+        if not (user.id in application.owners or user.administrator):
+            return {'details': 'This is not your application; you cannot push versions to it.'}, 403
+
+        # Open the upload.
+        success, response = upload_manager.open_upload(
+            user.id,
+            application_id,
+            application.package_name,
+            name,
+            platform,
+            str(release_date),
+            filename,
+            executable,
+            size,
+            chunk_size
+        )
+
+        if not success:
+            return response, 400
+
+        return response, 201
+
+
+class UploadVersionChunk(APIResource):
+    def put(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # The request body is the raw chunk, so the parameters are passed in the query string.
+        missing_arguments = [argument for argument in ['upload_id', 'index'] if argument not in request.args]
+
+        if missing_arguments:
+            return {'missing_parameters': missing_arguments}, 400
+
+        # Get the parameters.
+        upload_id: str = request.args.get('upload_id')
+        index: int = Utils.safe_int_cast(request.args.get('index'), -1)
+        chunk_hash: str | None = request.args.get('sha256')
+
+        # Ensure that the upload exists.
+        upload = upload_manager.get_upload(upload_id)
+
+        if not upload:
+            return {'details': 'The specified upload does not exist.'}, 400
+
+        # Ensure that the user is the one who opened the upload.
+        if not user.is_or_admin(upload.user_id):
+            return {'details': 'This is not your upload.'}, 403
+
+        # Write the chunk.
+        success, response = upload_manager.write_chunk(upload, index, request.stream, chunk_hash)
+
+        if not success:
+            return response, 400
 
         return response, 200
 
 
+class GetVersionUploadStatus(APIResource):
+    required_parameters = ['upload_id']
+
+    def get(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the parameters.
+        upload_id: str = request.form.get('upload_id')
+
+        # Ensure that the upload exists.
+        upload = upload_manager.get_upload(upload_id)
+
+        if not upload:
+            return {'details': 'The specified upload does not exist.'}, 400
+
+        # Ensure that the user is the one who opened the upload.
+        if not user.is_or_admin(upload.user_id):
+            return {'details': 'This is not your upload.'}, 403
+
+        return {
+            'upload_id': upload.id,
+            'chunk_size': upload.chunk_size,
+            'chunk_count': upload.chunk_count,
+            'received_chunks': upload.received_chunks,
+            'missing_chunks': upload.missing_chunks()
+        }, 200
+
+
+class CommitVersionUpload(APIResource):
+    required_parameters = ['upload_id']
+
+    def post(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the parameters.
+        upload_id: str = request.form.get('upload_id')
+
+        # Get the optional parameters.
+        file_hash: str | None = request.form.get('sha256')
+
+        # Ensure that the upload exists.
+        upload = upload_manager.get_upload(upload_id)
+
+        if not upload:
+            return {'details': 'The specified upload does not exist.'}, 400
+
+        # Ensure that the user is the one who opened the upload.
+        if not user.is_or_admin(upload.user_id):
+            return {'details': 'This is not your upload.'}, 403
+
+        # Commit the upload.
+        success, response = upload_manager.commit_upload(upload, file_hash)
+
+        if not success:
+            return response, 400
+
+        version_filepath: str = file_manager.generate_version_filepath(upload.package_name, upload.filename)
+
+        # Build the per-file manifest if the developer asked for incremental installs.
+        if Utils.safe_bool_cast(request.form.get('manifest')):
+            manifest_manager.queue_manifest(version_filepath)
+
+        # Produce the precompressed download variants.
+        artifact_compressor.queue_file(version_filepath)
+
+        return response, 200
+
+
+class AbortVersionUpload(APIResource):
+    required_parameters = ['upload_id']
+
+    def delete(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the parameters.
+        upload_id: str = request.form.get('upload_id')
+
+        # Ensure that the upload exists.
+        upload = upload_manager.get_upload(upload_id)
+
+        if not upload:
+            return {'details': 'The specified upload does not exist.'}, 400
+
+        # Ensure that the user is the one who opened the upload.
+        if not user.is_or_admin(upload.user_id):
+            return {'details': 'This is not your upload.'}, 403
+
+        upload_manager.abort_upload(upload)
+
+        return {}, 200
+
+
 class GetVersion(APIResource):
     required_parameters = ['application_id', 'version_name', 'platform']
 
@@ -1113,6 +1720,81 @@ class AcceptFriendRequest(APIResource):
         return response, 200
 
 
+class FriendRequestBatchResource(APIResource):
+    required_parameters = ['request_ids']
+
+    def process_requests(self, action: str):
+        missing, parameters = self.missing_parameters()
+
+        if missing:
+            return {'missing_parameters': parameters}, 400
+
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the parameters, dropping duplicates but keeping the order.
+        request_ids: list[int] = list(dict.fromkeys(Utils.safe_int_cast(id_)
+                                                    for id_ in request.form.get('request_ids').split(',')
+                                                    if id_.strip()))
+
+        if len(request_ids) > MAX_BATCH_FRIEND_REQUESTS:
+            return {'details': f'At most {MAX_BATCH_FRIEND_REQUESTS} friend requests can be processed at once.'}, 400
+
+        # Get all the friend requests at once.
+        friend_requests: dict = {friend_request.id: friend_request
+                                 for friend_request in database.get_friend_requests_by_ids(request_ids)}
+
+        results: list[dict] = []
+        allowed: list = []
+
+        for request_id in request_ids:
+            friend_request = friend_requests.get(request_id)
+
+            if not friend_request:
+                results.append({'id': request_id, 'success': False,
+                                'details': 'The specified friend request does not exist.'})
+                continue
+
+            # Only the recipient can accept or decline a request; either side (or an administrator) can delete it.
+            permitted: bool = friend_request.user_id == user.id or (
+                action == 'delete' and (friend_request.from_user_id == user.id or user.administrator))
+
+            if not permitted:
+                results.append({'id': request_id, 'success': False,
+                                'details': f'You cannot {action} this friend request.'})
+                continue
+
+            allowed.append(friend_request)
+            results.append({'id': request_id, 'success': True,
+                            'details': f'Friend request {action.rstrip("e")}ed successfully.'})
+
+        # Apply everything in a single transaction.
+        if allowed:
+            if action == 'accept':
+                database.process_friend_requests(allowed, [])
+            else:
+                database.process_friend_requests([], allowed)
+
+        return {'results': results}, 200
+
+
+class AcceptFriendRequests(FriendRequestBatchResource):
+    def post(self):
+        return self.process_requests('accept')
+
+
+class DeclineFriendRequests(FriendRequestBatchResource):
+    def post(self):
+        return self.process_requests('decline')
+
+
+class DeleteFriendRequests(FriendRequestBatchResource):
+    def delete(self):
+        return self.process_requests('delete')
+
+
 class GetIncomingFriendRequests(APIResource):
     required_parameters = ['user_id']
 
@@ -1202,11 +1884,199 @@ class GetFriends(APIResource):
         if not target_user:
             return {'details': 'The specified user does not exist.'}, 400
 
+        # Get the optional parameters.
+        expanded: bool = Utils.safe_bool_cast(request.form.get('expanded')) if 'expanded' in request.form else False
+        include_photos: bool = Utils.safe_bool_cast(request.form.get('include_photos')) \
+            if 'include_photos' in request.form \
+            else False
+
         # These records are public; no need to verify the user's identity.
+        if expanded:
+            # Return each friend's profile inline so the client doesn't have to look every friend up.
+            expanded_friends: list = []
+
+            for friend, friend_user, photo in database.get_friends_expanded(user_id, include_photos):
+                entry: dict = friend.into_dict()
+                entry['user'] = friend_user.into_dict(user.is_or_admin(friend_user.id))
+
+                if include_photos:
+                    entry['profile_photo'] = photo.into_dict() if photo else None
+
+                # Live presence is more current than the activity stored with the profile.
+                entry['presence'] = presence_manager.get(friend_user.id)
+
+                expanded_friends.append(entry)
+
+            return self.conditional_response({'friends': expanded_friends})
+
         # Get the user's friends.
         friends: list[Friend] = database.get_friends(user_id)
 
-        return {'friends': Utils.serialize(friends)}
+        return self.conditional_response({'friends': Utils.serialize(friends)})
+
+
+class GetInbox(APIResource):
+    def get(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the optional parameters.
+        # The cursor holds the last friend request, invite, IAP record and friendship change the client has seen.
+        positions: list[int] | None = Utils.decode_cursor(request.form.get('cursor'), 4) \
+            if 'cursor' in request.form \
+            else [0, 0, 0, 0]
+
+        if positions is None:
+            return {'details': 'The cursor is invalid.'}, 400
+
+        # Get everything that is new for the user since the cursor.
+        friend_requests = database.get_incoming_friend_requests_since(user.id, positions[0], INBOX_PAGE_SIZE)
+        invites = database.get_user_invites_since(user.id, positions[1], INBOX_PAGE_SIZE)
+        iap_records = database.get_unacknowledged_iap_records_since(user.id, positions[2], INBOX_PAGE_SIZE)
+        friend_changes = database.get_friend_changes_since(user.id, positions[3], INBOX_PAGE_SIZE)
+
+        # Move the cursor past everything returned.
+        sources: list = [friend_requests, invites, iap_records, friend_changes]
+        next_positions: list[int] = [items[-1].id if items else position for items, position in zip(sources, positions)]
+
+        return {
+            'friend_requests': Utils.serialize(friend_requests),
+            'invites': Utils.serialize(invites),
+            'iap_records': Utils.serialize(iap_records),
+            'friend_changes': Utils.serialize(friend_changes),
+            'cursor': Utils.encode_cursor(next_positions),
+            # A full page means there may be more; the client should call again straight away.
+            'has_more': any(len(items) == INBOX_PAGE_SIZE for items in sources)
+        }, 200
+
+
+class StreamEvents(APIResource):
+    def get(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        subscriber = event_broker.subscribe(user.id)
+
+        if subscriber is None:
+            response = Response('{"details": "The server is busy; please retry shortly."}', status=503,
+                                mimetype='application/json')
+            response.headers['Retry-After'] = str(EVENT_KEEPALIVE_SECONDS)
+
+            return response
+
+        # Push friend request, friendship and invite events to the client as they happen.
+        response = Response(event_broker.stream(subscriber), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        response.call_on_close(lambda: event_broker.unsubscribe(user.id, subscriber))
+
+        return response
+
+
+class SetPresence(APIResource):
+    required_parameters = ['application_id', 'description']
+
+    def post(self):
+        missing, parameters = self.missing_parameters()
+
+        if missing:
+            return {'missing_parameters': parameters}, 400
+
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the parameters.
+        application_id: int = Utils.safe_int_cast(request.form.get('application_id'))
+        description: str = request.form.get('description')
+
+        # Get the optional parameters.
+        try:
+            details: dict = json.loads(request.form.get('details')) if 'details' in request.form else {}
+        except json.JSONDecodeError:
+            return {'details': 'The details must be valid JSON.'}, 400
+
+        if not isinstance(details, dict):
+            return {'details': 'The details must be a JSON object.'}, 400
+
+        # Clients call this again as a heartbeat; presence expires if they stop.
+        presence_manager.set(user.id, application_id, description, details)
+
+        return {'details': 'Presence updated successfully.', 'expires_in': PRESENCE_TTL}, 200
+
+
+class ClearPresence(APIResource):
+    def post(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        presence_manager.clear(user.id)
+
+        return {'details': 'Presence cleared successfully.'}, 200
+
+
+class GetFriendsPresence(APIResource):
+    def get(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Only friends who are currently online are included.
+        activities: dict = presence_manager.get_many(friend_graph.get_friends(user.id))
+
+        return {
+            'presence': [{'user_id': user_id, 'activity': activity} for user_id, activity in activities.items()]
+        }, 200
+
+
+class GetMutualFriends(APIResource):
+    required_parameters = ['user_id']
+
+    def get(self):
+        missing, parameters = self.missing_parameters()
+
+        if missing:
+            return {'missing_parameters': parameters}, 400
+
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the parameters.
+        user_id: int = Utils.safe_int_cast(request.form.get('user_id'))
+
+        # Friend lists are public, so the friends two users share are too.
+        return {'user_ids': friend_graph.get_mutual_friends(user.id, user_id)}, 200
+
+
+class GetFriendSuggestions(APIResource):
+    def get(self):
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the optional parameters.
+        limit: int = min(MAX_FRIEND_SUGGESTIONS, max(1, Utils.safe_int_cast(request.form.get('limit'), 10))) \
+            if 'limit' in request.form \
+            else 10
+
+        # Suggest friends of friends, ranked by how many friends they share with the user.
+        suggestions = friend_graph.get_suggestions(user.id, limit)
+
+        return {
+            'suggestions': [{'user_id': user_id, 'mutual_friends': mutual_friends}
+                            for user_id, mutual_friends in suggestions]
+        }, 200
 
 
 class RemoveFriend(APIResource):
@@ -1303,6 +2173,46 @@ class SendInvite(APIResource):
         return {}, 200
 
 
+class SendInvites(APIResource):
+    required_parameters = ['user_ids', 'application_id', 'details']
+
+    def post(self):
+        missing, parameters = self.missing_parameters()
+
+        if missing:
+            return {'missing_parameters': parameters}, 400
+
+        success, response, response_code, session, user = self.verify_session(database)
+
+        if not success:
+            return response, response_code
+
+        # Get the parameters, dropping duplicates but keeping the order.
+        user_ids: list[int] = list(dict.fromkeys(Utils.safe_int_cast(id_)
+                                                 for id_ in request.form.get('user_ids').split(',') if id_.strip()))
+        application_id: int = Utils.safe_int_cast(request.form.get('application_id'))
+
+        try:
+            details: dict = json.loads(request.form.get('details'))
+        except json.JSONDecodeError:
+            return {'details': 'The details must be valid JSON.'}, 400
+
+        if len(user_ids) > MAX_BATCH_INVITES:
+            return {'details': f'At most {MAX_BATCH_INVITES} users can be invited at once.'}, 400
+
+        # Only friends can be invited.
+        friend_ids: set[int] = database.get_friend_ids_among(user.id, user_ids)
+        recipient_ids: list[int] = [user_id for user_id in user_ids if user_id in friend_ids]
+
+        # Send the invites.
+        invites = database.create_invites(recipient_ids, user.id, application_id, details, date.today())
+
+        return {
+            'invites': Utils.serialize(invites),
+            'not_friends': [user_id for user_id in user_ids if user_id not in friend_ids]
+        }, 200
+
+
 class GetInvites(APIResource):
     required_parameters = ['user_id']
 
@@ -1546,12 +2456,13 @@ class CreatePhoto(APIResource):
         # Get the file.
         file = request.files['photo']
 
+        # Ensure that the file is an image of an allowed type.
+        if not photo_processor.is_valid(file.filename or '', file.stream, ALLOWED_IMAGE_TYPES):
+            return {'details': f'The photo must be one of: {", ".join(ALLOWED_IMAGE_TYPES)}.'}, 400
+
         # Get the parameters.
         subfolder = request.form.get('subfolder')
 
-        # Ensure that the subdirectory exists.
-        os.makedirs(os.path.join(file_manager.photos_directory, subfolder), exist_ok=True)
-
         # Save the file.
         filename = Utils.generate_uuid4() + secure_filename(file.filename)
         filepath = file_manager.generate_photo_filepath(subfolder, filename)
@@ -1568,6 +2479,9 @@ class CreatePhoto(APIResource):
         if not success:
             return response, 400
 
+        # Generate the resized variants in the background.
+        photo_processor.queue_variants(filepath)
+
         return response, 201
 
 
@@ -1588,13 +2502,60 @@ class GetPhoto(APIResource):
         # Get the parameters.
         id_: int = Utils.safe_int_cast(request.form.get('id'))
 
+        # Get the optional parameters.
+        size: int = Utils.safe_int_cast(request.form.get('size')) if 'size' in request.form else 0
+
+        # Photos never change once created, so a cached copy can be served without touching the database or disk.
+        cache_key: tuple = (id_, photo_processor.get_variant_size(size))
+        cached_photo = photo_cache.get(cache_key)
+
+        if cached_photo:
+            return self.photo_response(cached_photo)
+
         # Ensure that the photo exists.
         photo = database.get_photo_by_id(id_)
 
         if not photo:
             return {'details': 'The specified photo does not exist.'}, 400
 
-        return send_file(file_manager.get_photo_filepath(id_), 'image/png')
+        # Pick the variant closest to the requested size.
+        photo_filepath: str = file_manager.get_photo_filepath_for(photo)
+        filepath, mimetype, variant_size = photo_processor.select_variant(photo_filepath, size)
+
+        # Stream large photos from disk instead of caching them.
+        if os.path.getsize(filepath) > photo_cache.max_item_bytes:
+            def build() -> Response:
+                response = send_file(filepath, mimetype, conditional=True)
+                response.headers['Cache-Control'] = PHOTO_CACHE_CONTROL
+
+                return response
+
+            return transfer_scheduler.dispatch(build)
+
+        with open(filepath, 'rb') as photo_file:
+            data: bytes = photo_file.read()
+
+        cached_photo = CachedPhoto(data, mimetype, hashlib.sha256(data).hexdigest()[:32])
+
+        # A fallback to the original is cached under the requested size too, as that variant will never exist (the
+        # original is smaller than it), unless it is still being generated.
+        if variant_size == cache_key[1] or not photo_processor.is_pending(photo_filepath):
+            photo_cache.put(cache_key, cached_photo)
+
+        return self.photo_response(cached_photo)
+
+    @staticmethod
+    def photo_response(cached_photo: CachedPhoto) -> Response:
+        # Answer conditional requests without resending the photo.
+        if request.if_none_match.contains(cached_photo.etag):
+            response = Response(status=304)
+        else:
+            response = Response(cached_photo.data, mimetype=cached_photo.mimetype)
+
+        response.set_etag(cached_photo.etag)
+        response.headers['Cache-Control'] = PHOTO_CACHE_CONTROL
+
+        return response
 
 
 class CreateIAP(APIResource):
@@ -1692,6 +2653,13 @@ class GetIAPs(APIResource):
         # Get the parameters.
         application_id: int = Utils.safe_int_cast(request.form.get('application_id'))
 
+        # IAPs only change along with the catalog, so unchanged clients can be answered right away.
+        etag: str = catalog_snapshot.token('iaps', application_id, user.id)
+        not_modified = self.not_modified_response(etag)
+
+        if not_modified:
+            return not_modified
+
         # Ensure that the application exists.
         application = database.get_application(application_id)
 
@@ -1701,7 +2669,8 @@ class GetIAPs(APIResource):
         # Get the iaps for the specified application.
         iaps: list[IAP] = database.get_iaps_for_application(application_id)
 
-        return {'iaps': Utils.serialize(iaps, user.administrator or user.id in application.owners)}, 200
+        return self.conditional_response(
+            {'iaps': Utils.serialize(iaps, user.administrator or user.id in application.owners)}, etag=etag)
 
 
 class UploadCloudData(APIResource):
@@ -1731,14 +2700,32 @@ class UploadCloudData(APIResource):
         if not database_utils.user_owns(user_id, application_id):
             return {'details': 'You do not own this application, and thus cannot upload cloud data for it.'}, 403
 
+        # With If-Match, only overwrite the save the client last downloaded (or, for *, any existing save). Clients
+        # echo the ETag of GetCloudData as it was sent; it is weak (W/) when the response was compressed, but the
+        # revision and hash in it still identify the stored save exactly, so weak tags are compared by value too.
+        expected_version: tuple[int, str] | None = None
+
+        if request.if_match and not request.if_match.star_tag:
+            revision, _, hash_ = next(iter(request.if_match.as_set(include_weak=True)), '').partition('-')
+
+            if not revision.isdigit():
+                return {'details': 'The If-Match header does not match the cloud data.'}, 412
+
+            expected_version = (int(revision), hash_)
+
         # Save the cloud data.
-        database.create_cloud_data(
+        success, response = database.create_cloud_data(
             user_id,
             application_id,
-            data
+            data,
+            expected_version,
+            bool(request.if_match)
         )
 
-        return {}, 201
+        if not success:
+            return response, 412
+
+        return response, 201, {'ETag': f'"{response["revision"]}-{response["hash"]}"'}
 
 
 class GetCloudData(APIResource):
@@ -1775,7 +2762,13 @@ class GetCloudData(APIResource):
         if not cloud_data:
             return {'details': 'The specified cloud data does not exist.'}, 400
 
-        return Utils.serialize(cloud_data, True)
+        # Skip decompressing the save entirely if the client already has this revision.
+        not_modified = self.not_modified_response(cloud_data.etag)
+
+        if not_modified:
+            return not_modified
+
+        return self.conditional_response(Utils.serialize(cloud_data, True), etag=cloud_data.etag)
 
 
 class DeleteCloudData(APIResource):
@@ -1886,6 +2879,10 @@ class UpdateProfilePhoto(APIResource):
         # Update the user's profile photo.
         database.update_user_property(user_id, 'profile_photo_id', photo_id)
 
+        # Let the storage collector reclaim the photo that was replaced.
+        if target_user.profile_photo_id not in [0, photo_id]:
+            database.add_replaced_photo(target_user.profile_photo_id)
+
         return {}, 200
 
 
@@ -2051,7 +3048,10 @@ class GetApplicationVersion(APIResource):
 
 # Main method.
 def main():
-    global email_manager, database, database_utils, file_manager, app, api
+    global email_manager, database, database_utils, file_manager, upload_manager, manifest_manager, \
+        artifact_compressor, photo_processor, photo_cache, catalog_index, \
+        catalog_snapshot, response_compressor, url_signer, transfer_scheduler, \
+        download_statistics, friend_graph, presence_manager, event_broker, download_offload_prefix, app, api
 
     # Initialize the logger.
     logger.remove()
@@ -2077,9 +3077,79 @@ def main():
 
     # Initialize the file manager.
     logger.info('Initializing file manager.')
-    file_manager = FileManager(database, BASE_DIRECTORY, PHOTOS_DIRECTORY, APPLICATIONS_DIRECTORY)
+    file_manager = FileManager(database, BASE_DIRECTORY, PHOTOS_DIRECTORY, APPLICATIONS_DIRECTORY, UPLOADS_DIRECTORY,
+                               CHUNKS_DIRECTORY, QUARANTINE_DIRECTORY)
     file_manager.initialize()
 
+    # Initialize the upload manager.
+    logger.info('Initializing upload manager.')
+    upload_manager = UploadManager(database, file_manager, MAX_UPLOAD_SIZE, MAX_UPLOAD_CHUNK_SIZE,
+                                   UPLOAD_EXPIRY_SECONDS)
+    upload_manager.initialize()
+
+    # Initialize the manifest manager.
+    logger.info('Initializing manifest manager.')
+    manifest_manager = ManifestManager(file_manager, MANIFEST_CHUNK_SIZE, MANIFEST_WORKERS)
+
+    # Initialize the artifact compressor, queueing any versions that have not been compressed yet.
+    logger.info('Initializing artifact compressor.')
+    artifact_compressor = ArtifactCompressor(COMPRESSION_MINIMUM_SAVINGS)
+    artifact_compressor.initialize(file_manager.get_all_version_filepaths())
+
+    # Initialize the photo processor.
+    logger.info('Initializing photo processor.')
+    photo_processor = PhotoProcessor(file_manager, PHOTO_VARIANT_SIZES, PHOTO_WORKERS)
+
+    # Initialize the photo cache.
+    logger.info('Initializing photo cache.')
+    photo_cache = PhotoCache(PHOTO_CACHE_SIZE, PHOTO_CACHE_ITEM_SIZE)
+
+    # Initialize the catalog index.
+    logger.info('Initializing catalog index.')
+    catalog_index = CatalogIndex(database)
+    catalog_index.initialize()
+
+    # Initialize the catalog snapshot.
+    logger.info('Initializing catalog snapshot.')
+    catalog_snapshot = CatalogSnapshot(database)
+    catalog_snapshot.initialize()
+
+    # Initialize the response compressor.
+    logger.info('Initializing response compressor.')
+    response_compressor = ResponseCompressor(COMPRESSION_MINIMUM_SIZE, COMPRESSION_EXCLUDED_PATHS)
+
+    # Initialize the URL signer.
+    logger.info('Initializing URL signer.')
+    url_signer = UrlSigner(os.getenv('DOWNLOAD_SIGNING_KEY'), SIGNED_URL_LIFETIME)
+
+    # Initialize the transfer scheduler.
+    logger.info('Initializing transfer scheduler.')
+    transfer_scheduler = TransferScheduler(MAX_CONCURRENT_TRANSFERS, TRANSFER_GLOBAL_RATE, TRANSFER_CONNECTION_RATE,
+                                           TRANSFER_RETRY_AFTER)
+
+    # Initialize the friend graph.
+    logger.info('Initializing friend graph.')
+    friend_graph = FriendGraph(database, FRIEND_GRAPH_COMPACTION_THRESHOLD)
+    friend_graph.initialize()
+
+    # Initialize the presence manager.
+    logger.info('Initializing presence manager.')
+    presence_manager = PresenceManager(database, PRESENCE_TTL, PRESENCE_SWEEP_INTERVAL, PRESENCE_PERSIST_INTERVAL)
+    presence_manager.initialize()
+
+    # Initialize the event broker.
+    logger.info('Initializing event broker.')
+    event_broker = EventBroker(MAX_EVENT_SUBSCRIBERS, EVENT_QUEUE_SIZE, EVENT_KEEPALIVE_SECONDS)
+    event_broker.initialize(database)
+
+    # Initialize the download statistics.
+    logger.info('Initializing download statistics.')
+    download_statistics = DownloadStatistics(database, DOWNLOAD_STATISTICS_FLUSH_INTERVAL)
+    download_statistics.initialize()
+
+    # Load the reverse proxy offload prefix (e.g. /protected/ for nginx's X-Accel-Redirect), if there is one.
+    download_offload_prefix = os.getenv('DOWNLOAD_OFFLOAD_PREFIX')
+
     # Load the HTTP server port.
     server_port: int = int(os.getenv('SERVER_PORT'))
 
@@ -2096,15 +3166,29 @@ def main():
     api.add_resource(Register, '/api/user/register')
     api.add_resource(Login, '/api/user/login')
     api.add_resource(GetUser, '/api/user/get')
+    api.add_resource(GetUsers, '/api/user/get-many')
     api.add_resource(AuthenticateSession, '/api/session/authenticate')
     api.add_resource(DeleteSession, '/api/session/delete')
     api.add_resource(DeleteSpecificSession, '/api/session/delete-specific')
     api.add_resource(CreateApplication, '/api/application/create')
     api.add_resource(GetApplication, '/api/application/get')
+    api.add_resource(SearchApplications, '/api/application/search')
+    api.add_resource(BrowseApplications, '/api/application/browse')
+    api.add_resource(GetCatalog, '/api/catalog/get')
     api.add_resource(GetApplicationVersions, '/api/application/versions')
     api.add_resource(DownloadApplicationVersion, '/api/application/versions/download')
+    api.add_resource(SignVersionDownload, '/api/application/versions/sign')
+    api.add_resource(SignedDownloadApplicationVersion, '/api/application/versions/signed-download')
+    api.add_resource(GetVersionManifest, '/api/application/versions/manifest')
+    api.add_resource(DownloadVersionChunk, '/api/application/versions/chunk')
+    api.add_resource(GetDownloadStatistics, '/api/application/statistics/downloads')
     api.add_resource(UpdateApplicationVersion, '/api/application/update-version')
     api.add_resource(CreateVersion, '/api/version/create')
+    api.add_resource(OpenVersionUpload, '/api/version/upload/open')
+    api.add_resource(UploadVersionChunk, '/api/version/upload/chunk')
+    api.add_resource(GetVersionUploadStatus, '/api/version/upload/status')
+    api.add_resource(CommitVersionUpload, '/api/version/upload/commit')
+    api.add_resource(AbortVersionUpload, '/api/version/upload/abort')
     api.add_resource(CreateSale, '/api/sales/create')
     api.add_resource(GetActiveSale, '/api/sales/get')
     api.add_resource(GetAllActiveSales, '/api/sales/get-all')
@@ -2124,9 +3208,20 @@ def main():
     api.add_resource(GetIncomingFriendRequests, '/api/friend/get-requests/incoming')
     api.add_resource(GetOutgoingFriendRequests, '/api/friend/get-requests/outgoing')
     api.add_resource(AcceptFriendRequest, '/api/friend/accept-request')
+    api.add_resource(AcceptFriendRequests, '/api/friend/accept-requests')
+    api.add_resource(DeclineFriendRequests, '/api/friend/decline-requests')
+    api.add_resource(DeleteFriendRequests, '/api/friend/delete-requests')
     api.add_resource(GetFriends, '/api/user/get-friends')
     api.add_resource(RemoveFriend, '/api/friend/remove')
+    api.add_resource(GetMutualFriends, '/api/friend/mutual')
+    api.add_resource(GetFriendSuggestions, '/api/friend/suggestions')
+    api.add_resource(SetPresence, '/api/presence/set')
+    api.add_resource(ClearPresence, '/api/presence/clear')
+    api.add_resource(GetFriendsPresence, '/api/presence/friends')
+    api.add_resource(StreamEvents, '/api/events/stream')
+    api.add_resource(GetInbox, '/api/user/inbox')
     api.add_resource(SendInvite, '/api/user/send-invite')
+    api.add_resource(SendInvites, '/api/user/send-invites')
     api.add_resource(GetInvites, '/api/user/get-invites')
     api.add_resource(GetInvite, '/api/user/get-invite')
     api.add_resource(DeleteInvite, '/api/user/delete-invite')
@@ -2147,6 +3242,9 @@ def main():
     api.add_resource(GetApplicationVersion, '/api/application/versions/get-specific')
     api.add_resource(GetVersion, '/api/application/versions/get/fine-tuned')
 
+    # Compress API responses.
+    app.after_request(response_compressor.compress)
+
     # Set up some loggers.
     @app.after_request
     def after_request(response):
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import tarfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+
+from loguru import logger
+
+from file_manager import FileManager
+
+
+class ManifestManager:
+    def __init__(self, file_manager: FileManager, chunk_size: int, workers: int):
+        self.file_manager: FileManager = file_manager
+        self.chunk_size: int = chunk_size
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='manifest')
+        self.chunk_hashes: dict[str, set] = {}
+        self.lock = threading.Lock()
+
+    def queue_manifest(self, version_filepath: str):
+        # Unpacking large archives takes a while, so it is done in the background.
+        self.executor.submit(self.build_manifest, version_filepath)
+
+    def build_manifest(self, version_filepath: str) -> bool:
+        try:
+            files: list = self.__chunk_archive(version_filepath)
+        except Exception as exception:
+            logger.error(f'Failed to build manifest for {version_filepath}: {exception}')
+
+            return False
+
+        if files is None:
+            logger.warning(f'Cannot build a manifest for {version_filepath}; it is not a zip or tar archive.')
+
+            return False
+
+        manifest: dict = {
+            'chunk_size': self.chunk_size,
+            'total_size': sum(file['size'] for file in files),
+            'files': files
+        }
+
+        # Write the manifest to a temporary file first so clients never see a partial manifest.
+        manifest_filepath: str = self.file_manager.get_manifest_filepath(version_filepath)
+
+        with open(manifest_filepath + '.tmp', 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+
+        os.replace(manifest_filepath + '.tmp', manifest_filepath)
+
+        logger.info(f'Built manifest for {version_filepath} - files: {len(files)}, size: {manifest["total_size"]}')
+
+        return True
+
+    def has_manifest(self, version_filepath: str) -> bool:
+        return path.exists(self.file_manager.get_manifest_filepath(version_filepath))
+
+    def manifest_contains(self, version_filepath: str, chunk_hash: str) -> bool:
+        # Manifests never change once written, so their chunk sets can be cached indefinitely.
+        with self.lock:
+            hashes = self.chunk_hashes.get(version_filepath)
+
+        if hashes is None:
+            with open(self.file_manager.get_manifest_filepath(version_filepath)) as manifest_file:
+                manifest = json.load(manifest_file)
+
+            hashes = {chunk for file in manifest['files'] for chunk in file['chunks']}
+
+            with self.lock:
+                self.chunk_hashes[version_filepath] = hashes
+
+        return chunk_hash in hashes
+
+    def __chunk_archive(self, version_filepath: str) -> list | None:
+        files: list = []
+
+        if zipfile.is_zipfile(version_filepath):
+            with zipfile.ZipFile(version_filepath) as archive:
+                for member in archive.infolist():
+                    if member.is_dir():
+                        continue
+
+                    # Zips made on Unix keep the permission bits in the high half of the external attributes; others
+                    # have none, so they get the default.
+                    with archive.open(member) as member_file:
+                        files.append(self.__chunk_file(member.filename, member_file,
+                                                       (member.external_attr >> 16) & 0o777 or 0o644))
+        elif tarfile.is_tarfile(version_filepath):
+            with tarfile.open(version_filepath) as archive:
+                for member in archive:
+                    if not member.isfile():
+                        continue
+
+                    with archive.extractfile(member) as member_file:
+                        files.append(self.__chunk_file(member.name, member_file, member.mode & 0o777))
+        else:
+            return None
+
+        return files
+
+    def __chunk_file(self, member_path: str, member_file, mode: int = 0o644) -> dict:
+        # Reject paths that would escape the install directory on the client. Backslashes are treated as separators
+        # before anything else, as Windows clients will.
+        parts: list = member_path.replace('\\', '/').split('/')
+
+        # An empty first part means the path was absolute; a colon in it means a drive letter.
+        if parts[0] == '' or ':' in parts[0] or '..' in parts:
+            raise ValueError(f'Unsafe path in archive: {member_path}')
+
+        normalized_path: str = '/'.join(part for part in parts if part not in ['', '.'])
+
+        file_hasher = hashlib.sha256()
+        chunks: list = []
+        size: int = 0
+
+        # Split the file into fixed-size chunks, storing each one under its own hash.
+        for block in iter(lambda: member_file.read(self.chunk_size), b''):
+            chunk_hash: str = hashlib.sha256(block).hexdigest()
+            chunk_filepath: str = self.file_manager.get_chunk_filepath(chunk_hash)
+
+            # Identical chunks are shared between files and versions.
+            if not path.exists(chunk_filepath):
+                os.makedirs(path.dirname(chunk_filepath), exist_ok=True)
+                temporary_filepath: str = f'{chunk_filepath}.{threading.get_ident()}.tmp'
+
+                with open(temporary_filepath, 'wb') as chunk_file:
+                    chunk_file.write(block)
+
+                os.replace(temporary_filepath, chunk_filepath)
+
+            file_hasher.update(block)
+            chunks.append(chunk_hash)
+            size += len(block)
+
+        return {'path': normalized_path, 'size': size, 'mode': mode, 'sha256': file_hasher.hexdigest(),
+                'chunks': chunks}
@@ -0,0 +1,40 @@
+import os
+import sys
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from database import Database
+from email_manager import EmailManager
+from file_manager import FileManager
+from main import BASE_DIRECTORY, PHOTOS_DIRECTORY, APPLICATIONS_DIRECTORY, UPLOADS_DIRECTORY, CHUNKS_DIRECTORY, \
+    QUARANTINE_DIRECTORY
+
+
+# Constants.
+BATCH_SIZE: int = 500
+PAUSE_SECONDS: float = 0.5
+
+
+# Moves photos and versions from the flat legacy layout into the sharded one.
+# This is safe to run while the server is up, as the server resolves files in either layout.
+def main():
+    logger.remove()
+    logger.add(sys.stdout, level='INFO')
+
+    load_dotenv()
+
+    email_manager = EmailManager(os.getenv('EMAIL_ADDRESS'), os.getenv('APP_PASSWORD'), os.getenv('DISPLAY_NAME'))
+
+    database = Database(email_manager)
+    database.initialize()
+
+    file_manager = FileManager(database, BASE_DIRECTORY, PHOTOS_DIRECTORY, APPLICATIONS_DIRECTORY, UPLOADS_DIRECTORY,
+                               CHUNKS_DIRECTORY, QUARANTINE_DIRECTORY)
+    file_manager.initialize()
+
+    file_manager.migrate_to_sharded_layout(BATCH_SIZE, PAUSE_SECONDS)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import threading
+from collections import OrderedDict
+
+
+class CachedPhoto:
+    def __init__(self, data: bytes, mimetype: str, etag: str):
+        self.data: bytes = data
+        self.mimetype: str = mimetype
+        self.etag: str = etag
+
+
+class PhotoCache:
+    def __init__(self, max_bytes: int, max_item_bytes: int):
+        self.max_bytes: int = max_bytes
+        self.max_item_bytes: int = max_item_bytes
+        self.size: int = 0
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key) -> CachedPhoto | None:
+        with self.lock:
+            entry: CachedPhoto | None = self.entries.get(key)
+
+            # Mark the entry as recently used.
+            if entry is not None:
+                self.entries.move_to_end(key)
+
+            return entry
+
+    def put(self, key, entry: CachedPhoto) -> bool:
+        # Don't let one huge photo push out hundreds of avatars.
+        if len(entry.data) > self.max_item_bytes:
+            return False
+
+        with self.lock:
+            previous: CachedPhoto | None = self.entries.pop(key, None)
+
+            if previous is not None:
+                self.size -= len(previous.data)
+
+            self.entries[key] = entry
+            self.size += len(entry.data)
+
+            # Evict the least recently used photos until the cache fits again.
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted.data)
+
+        return True
@@ -0,0 +1,120 @@
+import mimetypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+
+from loguru import logger
+
+from file_manager import FileManager
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+
+
+class PhotoProcessor:
+    # File signatures of the accepted image types.
+    signatures: dict = {
+        'png': b'\x89PNG\r\n\x1a\n',
+        'jpg': b'\xff\xd8\xff'
+    }
+
+    def __init__(self, file_manager: FileManager, sizes: list, workers: int):
+        self.file_manager: FileManager = file_manager
+        self.sizes: list = sorted(sizes)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='photo')
+        # Photos whose variants are queued or being generated.
+        self.pending: set[str] = set()
+        self.lock = threading.Lock()
+
+        if Image is None:
+            logger.warning('Pillow is not installed; photo variants will not be generated.')
+
+    @staticmethod
+    def get_extension(filename: str) -> str:
+        extension: str = path.splitext(filename)[1].lower().lstrip('.')
+
+        return 'jpg' if extension == 'jpeg' else extension
+
+    def is_valid(self, filename: str, stream, allowed_types: list) -> bool:
+        # Ensure that the extension is allowed.
+        extension: str = self.get_extension(filename)
+
+        if extension not in {'jpg' if type_.lower() == 'jpeg' else type_.lower() for type_ in allowed_types}:
+            return False
+
+        # Ensure that the contents actually match the extension.
+        header: bytes = stream.read(8)
+        stream.seek(0)
+
+        return header.startswith(self.signatures.get(extension, b'\x00'))
+
+    def queue_variants(self, photo_filepath: str):
+        if Image is None:
+            return
+
+        with self.lock:
+            self.pending.add(photo_filepath)
+
+        self.executor.submit(self.generate_variants, photo_filepath)
+
+    def is_pending(self, photo_filepath: str) -> bool:
+        with self.lock:
+            return photo_filepath in self.pending
+
+    def generate_variants(self, photo_filepath: str) -> list:
+        generated: list = []
+
+        try:
+            with Image.open(photo_filepath) as image:
+                # Apply the camera orientation before resizing, as it is lost when re-encoding.
+                image = ImageOps.exif_transpose(image)
+
+                if image.mode not in ['RGB', 'RGBA']:
+                    image = image.convert('RGBA')
+
+                for size in self.sizes:
+                    # Never upscale; clients fall back to the original for sizes it cannot fill.
+                    if max(image.size) < size:
+                        break
+
+                    variant = image.copy()
+                    variant.thumbnail((size, size), Image.LANCZOS)
+
+                    # Write to a temporary file first so a half-written variant is never served.
+                    variant_filepath: str = self.file_manager.get_photo_variant_filepath(photo_filepath, size)
+                    variant.save(variant_filepath + '.tmp', 'WEBP', quality=80, method=6)
+                    os.replace(variant_filepath + '.tmp', variant_filepath)
+
+                    generated.append(size)
+        except Exception as exception:
+            logger.error(f'Failed to generate variants for {photo_filepath}: {exception}')
+        finally:
+            with self.lock:
+                self.pending.discard(photo_filepath)
+
+        logger.info(f'Generated photo variants for {photo_filepath} - sizes: {generated}')
+
+        return generated
+
+    def get_variant_size(self, size: int) -> int:
+        # Get the smallest variant size that is at least as large as requested (0 meaning the original).
+        if size <= 0:
+            return 0
+
+        return next((variant_size for variant_size in self.sizes if variant_size >= size), 0)
+
+    def select_variant(self, photo_filepath: str, size: int) -> tuple[str, str, int]:
+        variant_size: int = self.get_variant_size(size)
+
+        if variant_size:
+            variant_filepath: str = self.file_manager.get_photo_variant_filepath(photo_filepath, variant_size)
+
+            if path.exists(variant_filepath):
+                return variant_filepath, 'image/webp', variant_size
+
+        # Fall back to the original.
+        return photo_filepath, mimetypes.guess_type(photo_filepath)[0] or 'application/octet-stream', 0
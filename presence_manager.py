@@ -0,0 +1,115 @@
+import atexit
+import json
+import threading
+import time
+
+from loguru import logger
+
+from database import Database
+from utils import Utils
+
+
+class PresenceManager:
+    def __init__(self, database: Database, ttl_seconds: int, sweep_interval: int, persist_interval: int):
+        self.database: Database = database
+        # Presence expires unless the client sends another heartbeat within this time.
+        self.ttl_seconds: int = ttl_seconds
+        self.sweep_interval: int = sweep_interval
+        # How often presence is written back to the users table; 0 keeps it in memory only.
+        self.persist_interval: int = persist_interval
+        # Maps each user id to their activity and when it expires.
+        self.entries: dict[int, tuple[dict, float]] = {}
+        # Users whose presence changed since it was last written.
+        self.dirty: set[int] = set()
+        self.lock = threading.Lock()
+        self.thread: threading.Thread | None = None
+
+    def initialize(self):
+        self.thread = threading.Thread(target=self.__run, name='presence-manager', daemon=True)
+        self.thread.start()
+
+        # Write the latest presence when the server shuts down.
+        if self.persist_interval > 0:
+            atexit.register(self.persist)
+
+    def set(self, user_id: int, application_id: int, description: str, details: dict):
+        activity: dict = Utils.generate_activity_dict(application_id, description, details)
+
+        with self.lock:
+            entry: tuple[dict, float] | None = self.entries.get(user_id)
+
+            # A heartbeat with the same activity only extends the expiry; there is nothing new to write.
+            if entry is None or entry[0] != activity:
+                self.dirty.add(user_id)
+
+            self.entries[user_id] = (activity, time.monotonic() + self.ttl_seconds)
+
+    def clear(self, user_id: int):
+        with self.lock:
+            if self.entries.pop(user_id, None) is not None:
+                self.dirty.add(user_id)
+
+    def get(self, user_id: int) -> dict | None:
+        return self.get_many([user_id]).get(user_id)
+
+    def get_many(self, user_ids: list[int]) -> dict[int, dict]:
+        now: float = time.monotonic()
+        activities: dict[int, dict] = {}
+
+        with self.lock:
+            for user_id in user_ids:
+                entry: tuple[dict, float] | None = self.entries.get(user_id)
+
+                if entry is not None and entry[1] > now:
+                    activities[user_id] = entry[0]
+
+        return activities
+
+    def persist(self):
+        with self.lock:
+            dirty: set[int] = self.dirty
+            self.dirty = set()
+
+            # Users without an entry have gone offline, so their stored activity is reset.
+            rows: list[tuple[str, int]] = [
+                (json.dumps(self.entries[user_id][0] if user_id in self.entries
+                            else Utils.generate_activity_dict(-1, '', {})), user_id)
+                for user_id in dirty
+            ]
+
+        if not rows:
+            return
+
+        try:
+            self.database.update_user_activities(rows)
+        except Exception as exception:
+            logger.error(f'Failed to persist presence: {exception}')
+
+            # Mark the users as changed again so they are retried with the next batch.
+            with self.lock:
+                self.dirty |= dirty
+
+            return
+
+        logger.info(f'Persisted presence - users: {len(rows)}')
+
+    def __sweep(self):
+        now: float = time.monotonic()
+
+        with self.lock:
+            expired: list[int] = [user_id for user_id, (_, expires) in self.entries.items() if expires <= now]
+
+            for user_id in expired:
+                del self.entries[user_id]
+                self.dirty.add(user_id)
+
+    def __run(self):
+        last_persisted: float = time.monotonic()
+
+        while True:
+            time.sleep(self.sweep_interval)
+            self.__sweep()
+
+            if self.persist_interval > 0 and time.monotonic() - last_persisted >= self.persist_interval:
+                self.persist()
+                last_persisted = time.monotonic()
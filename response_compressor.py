@@ -0,0 +1,108 @@
+import zlib
+
+from flask import Response, request
+
+from utils import Utils
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class ResponseCompressor:
+    compressible_mimetypes: list = ['application/json', 'text/plain', 'text/html']
+
+    def __init__(self, minimum_size: int, excluded_paths: list):
+        self.minimum_size: int = minimum_size
+        self.excluded_paths: list = excluded_paths
+
+        # Encodings in order of preference, skipping the ones whose modules aren't installed.
+        self.encodings: list = [encoding for encoding, available in
+                                [('zstd', zstandard is not None), ('br', brotli is not None), ('gzip', True)]
+                                if available]
+
+    def compress(self, response: Response) -> Response:
+        # Only compress successful text responses that haven't been encoded already.
+        # File responses (send_file) are passed through as-is; they are either already compressed or support ranges.
+        if (response.status_code < 200 or response.status_code in [204, 304]
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in self.compressible_mimetypes
+                or any(request.path.startswith(excluded_path) for excluded_path in self.excluded_paths)):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        encoding: str | None = self.select_encoding(request.headers.get('Accept-Encoding'))
+
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            # Compress streamed responses incrementally rather than buffering the whole body.
+            response.response = self.__compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data: bytes = response.get_data()
+
+            if len(data) < self.minimum_size:
+                return response
+
+            response.set_data(self.__compress_data(data, encoding))
+
+        response.headers['Content-Encoding'] = encoding
+
+        # The encoded body is no longer byte-for-byte what the ETag was computed over, so it can only be weak.
+        etag, weak = response.get_etag()
+
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        return response
+
+    def select_encoding(self, accept_encoding: str | None) -> str | None:
+        if not accept_encoding:
+            return None
+
+        accepted: dict = Utils.parse_accept_encoding(accept_encoding)
+
+        for encoding in self.encodings:
+            if accepted.get(encoding, accepted.get('*', 0)) > 0:
+                return encoding
+
+        return None
+
+    @staticmethod
+    def __compress_data(data: bytes, encoding: str) -> bytes:
+        if encoding == 'zstd':
+            return zstandard.ZstdCompressor(level=3).compress(data)
+        elif encoding == 'br':
+            return brotli.compress(data, quality=5)
+
+        return zlib.compress(data, 6, wbits=31)
+
+    @staticmethod
+    def __compress_stream(chunks, encoding: str):
+        if encoding == 'zstd':
+            compressor = zstandard.ZstdCompressor(level=3).compressobj()
+            compress, finish = compressor.compress, compressor.flush
+            flush = lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        elif encoding == 'br':
+            compressor = brotli.Compressor(quality=5)
+            compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+        else:
+            compressor = zlib.compressobj(6, wbits=31)
+            compress, finish = compressor.compress, compressor.flush
+            flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        for chunk in chunks:
+            # Flush after every chunk so the client receives it without waiting for more data.
+            yield compress(chunk.encode('utf-8') if isinstance(chunk, str) else chunk) + flush()
+
+        yield finish()
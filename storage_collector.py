@@ -0,0 +1,206 @@
+import os
+import time
+from datetime import date, timedelta
+from os import path
+
+from loguru import logger
+
+from database import Database
+from file_manager import FileManager
+
+
+class StorageCollector:
+    def __init__(self, database: Database, file_manager: FileManager, batch_size: int, pause_seconds: float,
+                 grace_seconds: int, retention_seconds: int, collect_superseded_versions: bool):
+        self.database: Database = database
+        self.file_manager: FileManager = file_manager
+        self.batch_size: int = batch_size
+        self.pause_seconds: float = pause_seconds
+        # Files younger than this are never touched, as their database row may not have been written yet.
+        self.grace_seconds: int = grace_seconds
+        # How long quarantined files are kept (so they can be restored) before being deleted.
+        self.retention_seconds: int = retention_seconds
+        # Superseded versions are always reported, but only removed when asked to, as players may still want them.
+        self.collect_superseded_versions: bool = collect_superseded_versions
+
+    def collect(self, dry_run: bool = False) -> dict:
+        report: dict = {'scanned': 0, 'quarantined': 0, 'quarantined_bytes': 0, 'deleted': 0, 'missing_photos': [],
+                        'missing_versions': [], 'replaced_photos': [], 'superseded_versions': []}
+
+        referenced: set = self.__find_referenced_files(report)
+
+        for directory in [self.file_manager.photos_directory, self.file_manager.applications_directory]:
+            self.__quarantine_orphans(directory, referenced, report, dry_run)
+
+        # The files of collectable rows have been quarantined along with the other orphans; now drop the rows.
+        if not dry_run:
+            self.database.delete_photos(report['replaced_photos'])
+
+            if self.collect_superseded_versions:
+                self.database.delete_application_versions(report['superseded_versions'])
+
+        self.__delete_expired(report, dry_run)
+
+        logger.info(f'Finished collecting storage - scanned: {report["scanned"]}, '
+                    f'quarantined: {report["quarantined"]} ({report["quarantined_bytes"]} bytes), '
+                    f'deleted: {report["deleted"]}, replaced photos: {len(report["replaced_photos"])}, '
+                    f'superseded versions: {len(report["superseded_versions"])}, '
+                    f'photos missing files: {len(report["missing_photos"])}, '
+                    f'versions missing files: {len(report["missing_versions"])}')
+
+        return report
+
+    def __find_referenced_files(self, report: dict) -> set:
+        # Every location a file could live at (sharded or legacy) counts as referenced.
+        referenced: set = set()
+
+        # Replaced profile photos are collectable once the grace period has passed since they were replaced, unless
+        # someone has set them as their profile photo again. Other photos are never touched, as they may be in use
+        # elsewhere.
+        profile_photo_ids: set[int] = self.database.get_profile_photo_ids()
+        replaced_photo_ids: set[int] = self.database.get_replaced_photo_ids(
+            date.today() - timedelta(seconds=self.grace_seconds))
+
+        # Read the tables a page at a time so the database is never held up by the collector.
+        after_id: int = 0
+
+        while photos := self.database.get_photos_after(after_id, self.batch_size):
+            for photo in photos:
+                filepaths: list = [self.file_manager.get_sharded_photo_filepath(photo.filename),
+                                   self.file_manager.get_legacy_photo_filepath(photo.subfolder, photo.filename)]
+
+                if photo.id in replaced_photo_ids and photo.id not in profile_photo_ids:
+                    report['replaced_photos'].append(photo.id)
+                    continue
+
+                referenced.update(filepaths)
+
+                if not any(path.exists(filepath) for filepath in filepaths):
+                    report['missing_photos'].append(photo.id)
+
+            after_id = photos[-1].id
+            time.sleep(self.pause_seconds)
+
+        applications: dict = {}
+        platform_versions: dict[tuple, list] = {}
+        after_id = 0
+
+        while versions := self.database.get_application_versions_after(after_id, self.batch_size):
+            for version in versions:
+                # Look up each application only once.
+                if version.application_id not in applications:
+                    applications[version.application_id] = self.database.get_application(version.application_id)
+
+                if applications[version.application_id] is None:
+                    report['missing_versions'].append(version.id)
+                    continue
+
+                platform_versions.setdefault((version.application_id, version.platform), []).append(version)
+
+            after_id = versions[-1].id
+            time.sleep(self.pause_seconds)
+
+        for (application_id, _), versions in platform_versions.items():
+            application = applications[application_id]
+
+            # Each platform keeps its newest version and the one the application lists as its latest; the rest have
+            # been superseded.
+            newest = max(versions, key=lambda version: (version.release_date, version.id))
+
+            for version in versions:
+                filepaths: list = [
+                    self.file_manager.get_sharded_version_filepath(application.package_name, version.filename),
+                    self.file_manager.get_legacy_version_filepath(application.package_name, version.filename)
+                ]
+
+                if version is not newest and version.name != application.latest_version:
+                    report['superseded_versions'].append(version.id)
+
+                    if self.collect_superseded_versions:
+                        continue
+
+                referenced.update(filepaths)
+
+                if not any(path.exists(filepath) for filepath in filepaths):
+                    report['missing_versions'].append(version.id)
+
+        return referenced
+
+    def __quarantine_orphans(self, directory: str, referenced: set, report: dict, dry_run: bool):
+        now: float = time.time()
+
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                filepath: str = path.join(root, filename)
+                report['scanned'] += 1
+
+                if report['scanned'] % self.batch_size == 0:
+                    time.sleep(self.pause_seconds)
+
+                if self.is_referenced(filepath, referenced):
+                    continue
+
+                try:
+                    stat = os.stat(filepath)
+                except FileNotFoundError:
+                    continue
+
+                if now - stat.st_mtime < self.grace_seconds:
+                    continue
+
+                report['quarantined'] += 1
+                report['quarantined_bytes'] += stat.st_size
+
+                if dry_run:
+                    logger.info(f'Would quarantine {filepath}')
+                    continue
+
+                # Keep the file's path relative to the data directory, so it can be moved back by hand.
+                quarantine_filepath: str = path.join(self.file_manager.quarantine_directory,
+                                                     path.relpath(filepath, self.file_manager.base_directory))
+                os.makedirs(path.dirname(quarantine_filepath), exist_ok=True)
+                os.replace(filepath, quarantine_filepath)
+
+                # Start the retention period from the moment the file was quarantined.
+                os.utime(quarantine_filepath)
+
+                logger.info(f'Quarantined {filepath}')
+
+    def __delete_expired(self, report: dict, dry_run: bool):
+        now: float = time.time()
+
+        for root, _, filenames in os.walk(self.file_manager.quarantine_directory):
+            for filename in filenames:
+                filepath: str = path.join(root, filename)
+
+                try:
+                    if now - os.stat(filepath).st_mtime < self.retention_seconds:
+                        continue
+                except FileNotFoundError:
+                    continue
+
+                report['deleted'] += 1
+
+                if dry_run:
+                    logger.info(f'Would delete {filepath}')
+                    continue
+
+                os.remove(filepath)
+
+                if report['deleted'] % self.batch_size == 0:
+                    time.sleep(self.pause_seconds)
+
+    @staticmethod
+    def is_referenced(filepath: str, referenced: set) -> bool:
+        # Derived files (variants, manifests, ...) are named after their owner plus extra suffixes, so strip those
+        # off one at a time until the owner turns up.
+        directory, filename = path.split(filepath)
+
+        while True:
+            if path.join(directory, filename) in referenced:
+                return True
+
+            if '.' not in filename:
+                return False
+
+            filename = filename.rsplit('.', 1)[0]
@@ -6,11 +6,36 @@ from structures.structure import Structure
 
 
 class CloudData(Structure):
-    attributes = ['id', 'user_id', 'application_id', 'data', 'date']
+    attributes = ['id', 'user_id', 'application_id', 'data', 'date', 'size', 'hash', 'revision']
 
-    def __init__(self, id_: int, user_id: int, application_id: int, data: str, date_: str):
+    def __init__(self, id_: int, user_id: int, application_id: int, data: str, date_: str, blob: bytes | None,
+                 encoding: str | None, size: int, hash_: str, revision: int):
         self.id: int = id_
         self.user_id: int = user_id
         self.application_id: int = application_id
-        self.data: dict = json.loads(data)
-        self.date: date = datetime.strptime(date_, '%Y-%m-%d').date()
\ No newline at end of file
+        self.date: date = datetime.strptime(date_, '%Y-%m-%d').date()
+        self.size: int = size
+        self.hash: str = hash_
+        # Counts the uploads, so clients can tell which version of the save they have.
+        self.revision: int = revision
+        # The save is only decompressed and parsed if something actually reads it.
+        self.raw_data: str = data
+        self.blob: bytes | None = blob
+        self.encoding: str | None = encoding
+        self.decoded_data: dict | None = None
+
+    @property
+    def etag(self) -> str:
+        return f'{self.revision}-{self.hash}'
+
+    @property
+    def data(self) -> dict:
+        if self.decoded_data is None:
+            from utils import Utils
+
+            # Rows written before saves were compressed keep the JSON in the data column.
+            raw_data: bytes | str = Utils.decompress_blob(self.blob, self.encoding) if self.blob is not None \
+                else self.raw_data
+            self.decoded_data = json.loads(raw_data)
+
+        return self.decoded_data
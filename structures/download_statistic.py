@@ -0,0 +1,15 @@
+from datetime import datetime
+from datetime import date
+
+from structures.structure import Structure
+
+
+class DownloadStatistic(Structure):
+    attributes = ['application_id', 'version_id', 'platform', 'date', 'downloads']
+
+    def __init__(self, application_id: int, version_id: int, platform: str, date_: str, downloads: int):
+        self.application_id: int = application_id
+        self.version_id: int = version_id
+        self.platform: str = platform
+        self.date: date = datetime.strptime(date_, '%Y-%m-%d').date()
+        self.downloads: int = downloads
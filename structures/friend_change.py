@@ -0,0 +1,15 @@
+from datetime import datetime
+from datetime import date
+
+from structures.structure import Structure
+
+
+class FriendChange(Structure):
+    attributes = ['id', 'user_id', 'other_user_id', 'change', 'date']
+
+    def __init__(self, id_: int, user_id: int, other_user_id: int, change: str, date_: str):
+        self.id: int = id_
+        self.user_id: int = user_id
+        self.other_user_id: int = other_user_id
+        self.change: str = change
+        self.date: date = datetime.strptime(date_, '%Y-%m-%d').date()
@@ -0,0 +1,40 @@
+from structures.structure import Structure
+
+
+class VersionUpload(Structure):
+    attributes = ['id', 'user_id', 'application_id', 'package_name', 'name', 'platform', 'release_date', 'filename',
+                  'executable', 'size', 'chunk_size', 'chunk_count', 'received_chunks', 'chunk_hashes', 'last_activity']
+
+    def __init__(self, id_: str, user_id: int, application_id: int, package_name: str, name: str, platform: str,
+                 release_date: str, filename: str, executable: str, size: int, chunk_size: int,
+                 received_chunks: list, chunk_hashes: dict, last_activity: float):
+        self.id: str = id_
+        self.user_id: int = user_id
+        self.application_id: int = application_id
+        self.package_name: str = package_name
+        self.name: str = name
+        self.platform: str = platform
+        self.release_date: str = release_date
+        self.filename: str = filename
+        self.executable: str = executable
+        self.size: int = size
+        self.chunk_size: int = chunk_size
+        self.chunk_count: int = max(1, -(-size // chunk_size))
+        self.received_chunks: list = sorted(received_chunks)
+        self.chunk_hashes: dict = chunk_hashes
+        self.last_activity: float = last_activity
+
+    def chunk_length(self, index: int) -> int:
+        # Every chunk is full-sized except (possibly) the last one.
+        if index == self.chunk_count - 1:
+            return self.size - (self.chunk_size * index)
+
+        return self.chunk_size
+
+    def missing_chunks(self) -> list:
+        received = set(self.received_chunks)
+
+        return [index for index in range(self.chunk_count) if index not in received]
+
+    def complete(self) -> bool:
+        return len(self.received_chunks) == self.chunk_count
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from flask import Response
+from loguru import logger
+
+
+class TokenBucket:
+    def __init__(self, rate: int, capacity: int):
+        self.rate: int = rate
+        self.capacity: int = capacity
+        self.tokens: float = capacity
+        self.updated: float = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount: int):
+        # A rate of 0 means unlimited.
+        if self.rate <= 0:
+            return
+
+        with self.lock:
+            now: float = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            # Take the tokens even if there aren't enough, then wait off the debt. Every connection waiting on the
+            # same bucket queues up behind the debt, which shares the bandwidth out fairly.
+            self.tokens -= amount
+            wait: float = -self.tokens / self.rate
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class TransferScheduler:
+    def __init__(self, max_transfers: int, global_rate: int, connection_rate: int, retry_after: int):
+        self.slots = threading.BoundedSemaphore(max_transfers)
+        self.max_transfers: int = max_transfers
+        self.global_bucket: TokenBucket = TokenBucket(global_rate, global_rate)
+        self.connection_rate: int = connection_rate
+        self.retry_after: int = retry_after
+        self.active: int = 0
+        self.lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        # Downloads never wait for a slot; they are turned away so they can't pile up and starve the API.
+        if not self.slots.acquire(blocking=False):
+            logger.warning(f'Rejected a download; all {self.max_transfers} transfer slots are in use.')
+
+            return False
+
+        with self.lock:
+            self.active += 1
+
+        return True
+
+    def release(self):
+        with self.lock:
+            self.active -= 1
+
+        self.slots.release()
+
+    def busy_response(self) -> Response:
+        response = Response('{"details": "The server is busy; please retry shortly."}', status=503,
+                            mimetype='application/json')
+        response.headers['Retry-After'] = str(self.retry_after)
+
+        return response
+
+    def dispatch(self, build) -> Response:
+        # Take a transfer slot, build the file response with it held and hand it over to be shaped.
+        if not self.acquire():
+            return self.busy_response()
+
+        try:
+            response: Response = build()
+        except Exception:
+            self.release()
+            raise
+
+        return self.schedule(response)
+
+    def schedule(self, response: Response) -> Response:
+        # Release the slot once the server is done with the response, however the transfer ends.
+        released: list = []
+
+        def release_once():
+            if not released:
+                released.append(True)
+                self.release()
+
+        response.call_on_close(release_once)
+
+        # Reverse proxies that send the file themselves are asked to apply the per-connection limit instead.
+        if 'X-Accel-Redirect' in response.headers:
+            if self.connection_rate > 0:
+                response.headers['X-Accel-Limit-Rate'] = str(self.connection_rate)
+
+            return response
+
+        response.response = self.__throttle(response.response)
+
+        return response
+
+    def __throttle(self, chunks):
+        connection_bucket: TokenBucket = TokenBucket(self.connection_rate, self.connection_rate)
+
+        try:
+            for chunk in chunks:
+                connection_bucket.consume(len(chunk))
+                self.global_bucket.consume(len(chunk))
+
+                yield chunk
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
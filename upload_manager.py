@@ -0,0 +1,301 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from os import path
+
+from loguru import logger
+
+from database import Database
+from file_manager import FileManager
+from structures.version_upload import VersionUpload
+from utils import Utils
+
+
+class UploadManager:
+    def __init__(self, database: Database, file_manager: FileManager, max_upload_size: int, max_chunk_size: int,
+                 expiry_seconds: int):
+        self.database: Database = database
+        self.file_manager: FileManager = file_manager
+        # The temporary file is pre-allocated to the declared size, so that size has to be capped.
+        self.max_upload_size: int = max_upload_size
+        self.max_chunk_size: int = max_chunk_size
+        self.expiry_seconds: int = expiry_seconds
+        self.uploads: dict[str, VersionUpload] = {}
+        self.locks: dict[str, threading.Lock] = {}
+        self.lock = threading.Lock()
+
+    def initialize(self):
+        # Reload the uploads that were in progress before the server stopped so that clients can resume them.
+        for entry in os.listdir(self.file_manager.uploads_directory):
+            # Chunks that were still being received when the server stopped have to be sent again.
+            if entry.endswith('.chunk'):
+                os.remove(path.join(self.file_manager.uploads_directory, entry))
+                continue
+
+            if not entry.endswith('.json'):
+                continue
+
+            with open(path.join(self.file_manager.uploads_directory, entry)) as metadata_file:
+                upload = VersionUpload(**json.load(metadata_file))
+
+            self.uploads[upload.id] = upload
+            self.locks[upload.id] = threading.Lock()
+
+        logger.info(f'Loaded {len(self.uploads)} in-progress version upload(s).')
+
+        self.delete_expired_uploads()
+
+    def open_upload(self, user_id: int, application_id: int, package_name: str, name: str, platform: str,
+                    release_date: str, filename: str, executable: str, size: int,
+                    chunk_size: int) -> tuple[bool, dict]:
+        # Ensure that the chunk layout is sane.
+        if not 0 <= size <= self.max_upload_size:
+            return False, {'details': f'The upload size must be between 0 and {self.max_upload_size} bytes.'}
+
+        if not 0 < chunk_size <= self.max_chunk_size:
+            return False, {'details': f'The chunk size must be between 1 and {self.max_chunk_size} bytes.'}
+
+        # Make sure the version does not already exist before the client starts sending data.
+        if self.database.get_application_version(application_id, name, platform):
+            return False, {'details': 'Application version already exists.'}
+
+        self.delete_expired_uploads()
+
+        upload = VersionUpload(
+            Utils.generate_uuid4(),
+            user_id,
+            application_id,
+            package_name,
+            name,
+            platform,
+            release_date,
+            filename,
+            executable,
+            size,
+            chunk_size,
+            [],
+            {},
+            time.time()
+        )
+
+        # Pre-allocate the temporary file so that chunks can be written at their offsets in any order.
+        with open(self.get_data_filepath(upload.id), 'wb') as data_file:
+            data_file.truncate(size)
+
+        with self.lock:
+            self.uploads[upload.id] = upload
+            self.locks[upload.id] = threading.Lock()
+
+        self.save_metadata(upload)
+
+        logger.info(f'Opened version upload {upload.id} for application: {application_id} - version name: {name}, '
+                    f'platform: {platform}, size: {size}, chunks: {upload.chunk_count}')
+
+        return True, {'upload_id': upload.id, 'chunk_size': chunk_size, 'chunk_count': upload.chunk_count}
+
+    def get_upload(self, upload_id: str) -> VersionUpload | None:
+        return self.uploads.get(upload_id)
+
+    def write_chunk(self, upload: VersionUpload, index: int, stream, expected_hash: str | None) -> tuple[bool, dict]:
+        # Ensure that the chunk belongs to the upload.
+        if not 0 <= index < upload.chunk_count:
+            return False, {'details': 'The specified chunk index is out of range.'}
+
+        lock: threading.Lock | None = self.locks.get(upload.id)
+
+        if lock is None or upload.id not in self.uploads:
+            return False, {'details': 'The specified upload does not exist.'}
+
+        length: int = upload.chunk_length(index)
+        hasher = hashlib.sha256()
+        written: int = 0
+
+        # Stream the request body into a file of its own, hashing it along the way. It only replaces the chunk's
+        # slot in the upload once it has been checked, so a bad resend can never overwrite a chunk that arrived intact.
+        chunk_filepath: str = self.get_chunk_filepath(upload.id, index)
+
+        try:
+            with open(chunk_filepath, 'wb') as chunk_file:
+                while written < length:
+                    block = stream.read(min(65536, length - written))
+
+                    if not block:
+                        break
+
+                    chunk_file.write(block)
+                    hasher.update(block)
+                    written += len(block)
+
+            if written != length or stream.read(1):
+                return False, {'details': f'Chunk {index} must be exactly {length} bytes.'}
+
+            chunk_hash: str = hasher.hexdigest()
+
+            if expected_hash and expected_hash.lower() != chunk_hash:
+                return False, {'details': f'Chunk {index} does not match the provided hash.'}
+
+            # Copy the chunk into place and record it, unless the upload was committed or aborted in the meantime.
+            with lock:
+                if upload.id not in self.uploads:
+                    return False, {'details': 'The specified upload does not exist.'}
+
+                with open(chunk_filepath, 'rb') as chunk_file, \
+                        open(self.get_data_filepath(upload.id), 'r+b') as data_file:
+                    data_file.seek(index * upload.chunk_size)
+                    shutil.copyfileobj(chunk_file, data_file, 65536)
+
+                if index not in upload.received_chunks:
+                    upload.received_chunks = sorted(upload.received_chunks + [index])
+
+                upload.chunk_hashes[str(index)] = chunk_hash
+                upload.last_activity = time.time()
+
+                self.save_metadata(upload)
+        finally:
+            if path.exists(chunk_filepath):
+                os.remove(chunk_filepath)
+
+        return True, {'index': index, 'sha256': chunk_hash, 'missing_chunks': upload.missing_chunks()}
+
+    def commit_upload(self, upload: VersionUpload, expected_hash: str | None) -> tuple[bool, dict]:
+        lock: threading.Lock | None = self.locks.get(upload.id)
+
+        if lock is None:
+            return False, {'details': 'The specified upload does not exist.'}
+
+        with lock:
+            # Another request may have committed or aborted the upload while this one was waiting for the lock.
+            if upload.id not in self.uploads:
+                return False, {'details': 'The specified upload does not exist.'}
+
+            # Ensure that every chunk has arrived.
+            if not upload.complete():
+                return False, {'details': 'The upload is missing chunks.', 'missing_chunks': upload.missing_chunks()}
+
+            data_filepath: str = self.get_data_filepath(upload.id)
+
+            # Check every chunk against the hash it was recorded with, and hash the assembled file so the client can
+            # verify that nothing was lost between chunks.
+            file_hash, corrupt_chunks = self.verify_data_file(upload)
+
+            if corrupt_chunks:
+                # Forget the damaged chunks so the client sends them again.
+                upload.received_chunks = [index for index in upload.received_chunks if index not in corrupt_chunks]
+
+                for index in corrupt_chunks:
+                    upload.chunk_hashes.pop(str(index), None)
+
+                self.save_metadata(upload)
+
+                return False, {'details': 'The upload has corrupt chunks.', 'missing_chunks': upload.missing_chunks()}
+
+            if expected_hash and expected_hash.lower() != file_hash:
+                return False, {'details': 'The uploaded file does not match the provided hash.', 'sha256': file_hash}
+
+            # Move the file into place. The rename is atomic, so a partially written version is never visible.
+            version_filepath: str = self.file_manager.generate_version_filepath(upload.package_name, upload.filename)
+            os.replace(data_filepath, version_filepath)
+
+            # Create the version entry now that the file is in place.
+            success, response = self.database.create_application_version(
+                upload.application_id,
+                upload.name,
+                upload.platform,
+                upload.release_date,
+                upload.filename,
+                upload.executable
+            )
+
+            if not success:
+                # Don't leave an orphaned file behind if the version could not be created.
+                os.remove(version_filepath)
+            else:
+                response['sha256'] = file_hash
+
+            self.forget_upload(upload.id)
+
+        logger.info(f'Committed version upload {upload.id} - success: {success}')
+
+        return success, response
+
+    def abort_upload(self, upload: VersionUpload):
+        lock: threading.Lock | None = self.locks.get(upload.id)
+
+        if lock is None:
+            return
+
+        with lock:
+            if upload.id not in self.uploads:
+                return
+
+            self.forget_upload(upload.id)
+
+            if path.exists(self.get_data_filepath(upload.id)):
+                os.remove(self.get_data_filepath(upload.id))
+
+        logger.warning(f'Aborted version upload {upload.id}')
+
+    def delete_expired_uploads(self):
+        cutoff: float = time.time() - self.expiry_seconds
+
+        for upload in list(self.uploads.values()):
+            if upload.last_activity < cutoff:
+                self.abort_upload(upload)
+
+    def forget_upload(self, upload_id: str):
+        with self.lock:
+            self.uploads.pop(upload_id, None)
+            self.locks.pop(upload_id, None)
+
+        if path.exists(self.get_metadata_filepath(upload_id)):
+            os.remove(self.get_metadata_filepath(upload_id))
+
+    def verify_data_file(self, upload: VersionUpload) -> tuple[str, list]:
+        file_hasher = hashlib.sha256()
+        corrupt_chunks: list = []
+
+        with open(self.get_data_filepath(upload.id), 'rb') as data_file:
+            for index in range(upload.chunk_count):
+                chunk_hasher = hashlib.sha256()
+                remaining: int = upload.chunk_length(index)
+
+                while remaining > 0:
+                    block = data_file.read(min(1048576, remaining))
+
+                    if not block:
+                        break
+
+                    chunk_hasher.update(block)
+                    file_hasher.update(block)
+                    remaining -= len(block)
+
+                if upload.chunk_hashes.get(str(index)) != chunk_hasher.hexdigest():
+                    corrupt_chunks.append(index)
+
+        return file_hasher.hexdigest(), corrupt_chunks
+
+    def save_metadata(self, upload: VersionUpload):
+        # Write the metadata to a temporary file first so a crash never leaves it half-written.
+        metadata = upload.into_dict()
+        metadata['id_'] = metadata.pop('id')
+        del metadata['chunk_count']
+
+        temporary_filepath: str = self.get_metadata_filepath(upload.id) + '.tmp'
+
+        with open(temporary_filepath, 'w') as metadata_file:
+            json.dump(metadata, metadata_file)
+
+        os.replace(temporary_filepath, self.get_metadata_filepath(upload.id))
+
+    def get_data_filepath(self, upload_id: str) -> str:
+        return path.join(self.file_manager.uploads_directory, upload_id + '.part')
+
+    def get_chunk_filepath(self, upload_id: str, index: int) -> str:
+        # The same chunk may be sent more than once at the same time, so each attempt gets its own file.
+        return path.join(self.file_manager.uploads_directory, f'{upload_id}.{index}.{Utils.generate_uuid4()}.chunk')
+
+    def get_metadata_filepath(self, upload_id: str) -> str:
+        return path.join(self.file_manager.uploads_directory, upload_id + '.json')
@@ -0,0 +1,46 @@
+import hashlib
+import hmac
+import json
+import secrets
+import time
+
+from loguru import logger
+
+from utils import Utils
+
+
+class UrlSigner:
+    def __init__(self, secret: str | None, lifetime: int):
+        if not secret:
+            # Signed URLs will stop working on restart, which is acceptable but worth knowing about.
+            logger.warning('No download signing key is configured; generating a temporary one.')
+            secret = secrets.token_hex(32)
+
+        self.secret: bytes = secret.encode('utf-8')
+        self.lifetime: int = lifetime
+
+    def sign(self, parameters: dict) -> dict:
+        signed_parameters: dict = {key: str(value) for key, value in parameters.items()}
+        signed_parameters['expires'] = str(int(time.time()) + self.lifetime)
+        signed_parameters['signature'] = self.__signature(signed_parameters)
+
+        return signed_parameters
+
+    def verify(self, parameters: dict) -> tuple[bool, str]:
+        signature: str = parameters.get('signature', '')
+        unsigned_parameters: dict = {key: value for key, value in parameters.items() if key != 'signature'}
+
+        # Compare bytes, as compare_digest refuses strings with non-ASCII characters.
+        if not hmac.compare_digest(signature.encode('utf-8'), self.__signature(unsigned_parameters).encode('utf-8')):
+            return False, 'The signature is invalid.'
+
+        if int(time.time()) > Utils.safe_int_cast(parameters.get('expires', '0')):
+            return False, 'The link has expired.'
+
+        return True, ''
+
+    def __signature(self, parameters: dict) -> str:
+        # Sign a canonical form of the parameters so their order in the URL doesn't matter.
+        message: str = json.dumps(sorted(parameters.items()))
+
+        return hmac.new(self.secret, message.encode('utf-8'), hashlib.sha256).hexdigest()
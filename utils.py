@@ -1,6 +1,9 @@
+import base64
 import uuid
 import random
 import bcrypt
+import hashlib
+import zlib
 
 from datetime import date
 
@@ -11,7 +14,9 @@ from structures.application_session import ApplicationSession
 from structures.application_version import ApplicationVersion
 from structures.cloud_data import CloudData
 from structures.deposit import Deposit
+from structures.download_statistic import DownloadStatistic
 from structures.friend import Friend
+from structures.friend_change import FriendChange
 from structures.friend_request import FriendRequest
 from structures.iap import IAP
 from structures.invite import Invite
@@ -23,6 +28,11 @@ from structures.structure import Structure
 from structures.transaction import Transaction
 from structures.user import User
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 
 class Utils:
     @staticmethod
@@ -51,6 +61,17 @@ class Utils:
     def password_matches(password: str, hashed_password: str) -> bool:
         return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+    @staticmethod
+    def hash_file(filepath: str) -> str:
+        hasher = hashlib.sha256()
+
+        # Hash the file in blocks so large files never have to be loaded into memory.
+        with open(filepath, 'rb') as file:
+            for block in iter(lambda: file.read(1048576), b''):
+                hasher.update(block)
+
+        return hasher.hexdigest()
+
     @staticmethod
     def generate_user_identifier() -> str:
         return uuid.uuid4().hex
@@ -63,6 +84,41 @@ class Utils:
             'details': details
         }
 
+    @staticmethod
+    def compress_blob(data: bytes) -> tuple[bytes, str]:
+        # Prefer zstd, falling back to zlib if the zstandard module isn't installed.
+        if zstandard is not None:
+            return zstandard.ZstdCompressor(level=3).compress(data), 'zstd'
+
+        return zlib.compress(data, 6), 'zlib'
+
+    @staticmethod
+    def decompress_blob(blob: bytes, encoding: str) -> bytes:
+        if encoding == 'zstd':
+            return zstandard.ZstdDecompressor().decompress(blob)
+
+        return zlib.decompress(blob)
+
+    @staticmethod
+    def encode_cursor(positions: list[int]) -> str:
+        # Cursors are opaque to clients so their contents can change without breaking them.
+        encoded: bytes = base64.urlsafe_b64encode('.'.join(str(position) for position in positions).encode('utf-8'))
+
+        return encoded.decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str, count: int) -> list[int] | None:
+        try:
+            positions: list[int] = [int(position) for position in
+                                    base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('.')]
+        except ValueError:
+            return None
+
+        if len(positions) != count:
+            return None
+
+        return positions
+
     @staticmethod
     def generate_verification_code() -> int:
         return random.randint(100000, 999999)
@@ -106,6 +162,26 @@ class Utils:
         except ValueError:
             return default
 
+    @staticmethod
+    def parse_accept_encoding(header: str) -> dict:
+        # Turn a header such as "gzip;q=0.8, zstd" into {'gzip': 0.8, 'zstd': 1.0}.
+        encodings: dict = {}
+
+        for part in header.split(','):
+            name, _, parameters = part.strip().partition(';')
+
+            if not name:
+                continue
+
+            quality: float = 1.0
+
+            if parameters.strip().startswith('q='):
+                quality = Utils.safe_float_cast(parameters.strip()[2:], 0)
+
+            encodings[name.strip().lower()] = quality
+
+        return encodings
+
     @staticmethod
     def serialize(item, private: bool = False):
         if isinstance(item, Structure):
@@ -249,6 +325,16 @@ class Utils:
             row['date']
         )
 
+    @staticmethod
+    def row_to_friend_change(row: dict) -> FriendChange:
+        return FriendChange(
+            row['id'],
+            row['user_id'],
+            row['other_user_id'],
+            row['change'],
+            row['date']
+        )
+
     @staticmethod
     def row_to_friend(row: dict) -> Friend:
         return Friend(
@@ -301,6 +387,16 @@ class Utils:
             row['created_at']
         )
 
+    @staticmethod
+    def row_to_download_statistic(row: dict) -> DownloadStatistic:
+        return DownloadStatistic(
+            row['application_id'],
+            row['version_id'],
+            row['platform'],
+            row['date'],
+            row['downloads']
+        )
+
     @staticmethod
     def row_to_iap(row: dict) -> IAP:
         return IAP(
@@ -319,7 +415,12 @@ class Utils:
             row['user_id'],
             row['application_id'],
             row['data'],
-            row['date']
+            row['date'],
+            row['blob'],
+            row['encoding'],
+            row['size'],
+            row['hash'],
+            row['revision']
         )
 
     @staticmethod